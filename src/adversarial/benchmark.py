@@ -0,0 +1,449 @@
+'''
+Benchmark dos motores dos jogos adversariais sobre um conjunto fixo de posições.
+
+Cada jogo tem posições de abertura, meio-jogo, táticas e de final. Cada motor
+joga uma vez cada posição (com semente fixa, então a jogada e os nós são
+reprodutíveis) e são medidos o tempo (o menor de `repeat` execuções), os nós,
+os nós por segundo e se a jogada está entre as melhores da referência. Nos
+motores com aprofundamento iterativo também é medido o tempo para chegar a
+cada profundidade (alfa-beta do Connect Four e QuartoSolver).
+
+As referências são as jogadas de valor ótimo calculadas pelos métodos exatos
+(tabela do Tic-Tac-Toe, connect_four_solver e QuartoSolver até o fim da
+partida) e ficam gravadas no próprio conjunto de posições, porque algumas
+levam quase um minuto para serem calculadas; `--references` as recalcula.
+Posições sem referência (aberturas em que todas as jogadas se equivalem ou
+que os métodos exatos não resolvem a tempo) só entram nas medidas de tempo.
+
+Toda execução termina com erro se um motor errar uma posição que ele tem
+de acertar (REQUIRED_AGREEMENT). Essa verificação não depende de baseline,
+porque as referências não dependem da máquina.
+
+As medidas de tempo são gravadas como baseline em JSON (`--save`). Ela é
+local e fica fora do git, porque os tempos dependem da máquina. Quando há
+baseline, a execução também termina com erro se alguma jogada deixou de
+concordar com a referência, se os nós por segundo caíram ou se o tempo para
+alguma profundidade subiu mais que a tolerância. Como a velocidade da máquina varia entre execuções (outros
+processos, frequência da CPU), cada execução também mede uma carga fixa de
+calibração, e as velocidades são corrigidas pela razão entre as calibrações
+antes da comparação; a coluna Δ do relatório já vem corrigida.
+
+Uso: python benchmark.py [--games connect_four quarto] [--repeat N] [--save] [--tolerance 0.25]
+'''
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import namedtuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'q2.2'))
+
+from tic_tac_toe import TicTacToe
+from tic_tac_toe_table import get_table
+from minimax import best_move as tic_tac_toe_minimax, iterative_deepening
+from connect_four_eval import evaluate_connect_four_np, evaluate_games_batch
+from connect_four_solver import ConnectFourSolver
+from transposition import TranspositionTable
+from tournament import ENGINES, CountingConnectFour, CountingQuarto, counted
+
+from quarto_solver import QuartoSolver, WIN
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+TOLERANCE = 0.25
+# Medidas mais curtas que isso (em segundos) são ruidosas demais para comparar a velocidade
+MIN_TIME = 0.05
+
+# moves: jogadas a partir do início; no Quarto, o primeiro elemento é a peça inicial.
+# best: jogadas de valor ótimo (no Quarto, (linha, coluna) vale para qualquer peça entregue) ou None
+Position = namedtuple('Position', 'name category moves best')
+
+CORPUS = {
+    'tic_tac_toe': [
+        Position('vazio', 'abertura', [], None),
+        Position('canto', 'abertura', [(0, 0)], [(1, 1)]),
+        Position('diagonal', 'meio-jogo', [(0, 0), (1, 1), (2, 2)], [(0, 1), (1, 0), (1, 2), (2, 1)]),
+        Position('vitória imediata', 'tática', [(0, 0), (1, 1), (0, 1), (2, 2)], [(0, 2), (1, 0), (2, 0)]),
+        Position('bloqueio', 'tática', [(0, 0), (1, 1), (0, 1)], [(0, 2)]),
+        Position('seis peças', 'final', [(1, 1), (0, 0), (2, 2), (0, 2), (0, 1), (2, 1)],
+                 [(1, 0), (1, 2), (2, 0)]),
+    ],
+    'connect_four': [
+        # O jogo está resolvido: só a coluna central vence
+        Position('vazio', 'abertura', [], [3]),
+        Position('centro', 'abertura', [3], None),
+        Position('meio-jogo 14', 'meio-jogo', [0, 4, 5, 6, 5, 4, 1, 2, 5, 2, 2, 5, 0, 5], [2, 5, 6]),
+        Position('meio-jogo 18', 'meio-jogo', [2, 3, 2, 1, 2, 5, 0, 2, 4, 5, 6, 6, 1, 6, 6, 1, 1, 1], [3]),
+        Position('meio-jogo 20', 'meio-jogo', [4, 4, 1, 5, 6, 3, 3, 3, 2, 3, 4, 1, 4, 0, 4, 4, 1, 3, 3, 6], [1]),
+        Position('vitória imediata', 'tática', [3, 0, 3, 0, 3, 6, 0, 6], [3]),
+        Position('bloqueio', 'tática', [3, 0, 3, 0, 3], [3]),
+        # Três em linha na base com as duas pontas livres: só 1 e 4 vencem em 3 lances
+        Position('ameaça dupla', 'tática', [3, 3, 2, 2], [1, 4]),
+        Position('final 24', 'final',
+                 [3, 6, 2, 3, 6, 5, 0, 1, 6, 0, 5, 1, 2, 1, 1, 3, 2, 2, 1, 3, 3, 6, 2, 5], [3]),
+        Position('final 28', 'final',
+                 [5, 4, 0, 5, 3, 5, 3, 0, 5, 1, 6, 6, 0, 5, 0, 6, 2, 0, 0, 5, 4, 4, 3, 3, 6, 2, 6, 1], [1, 2]),
+        Position('final 32', 'final',
+                 [1, 4, 0, 0, 0, 3, 0, 3, 3, 3, 6, 5, 2, 2, 1, 4, 5, 3, 0, 0, 2, 1, 2, 5, 5, 2, 6, 4, 4, 5, 4, 1],
+                 [3]),
+    ],
+    'quarto': [
+        Position('vazio', 'abertura', [0], None),
+        Position('quatro peças', 'meio-jogo', [5, (1, 1, 10), (2, 2, 3), (0, 3, 12), (3, 0, 6)], None),
+        Position('vitória imediata', 'tática',
+                 [12, (2, 3, 1), (1, 1, 2), (3, 2, 6), (1, 3, 13), (3, 3, 14)], [(0, 3)]),
+        Position('vitória forçada', 'tática',
+                 [2, (0, 0, 10), (2, 2, 11), (3, 2, 8), (0, 1, 14), (3, 1, 9), (2, 3, 6)],
+                 [(1, 1, 1), (1, 1, 13)]),
+        Position('final 9', 'final',
+                 [7, (3, 3, 4), (2, 1, 1), (2, 2, 8), (3, 0, 9), (0, 0, 2), (3, 2, 10), (3, 1, 12)],
+                 [(0, 2, 0), (0, 2, 6), (0, 2, 14), (1, 1, 5), (1, 1, 15), (1, 3, 0), (1, 3, 6), (2, 3, 14)]),
+        Position('final 8', 'final',
+                 [7, (3, 3, 8), (3, 0, 3), (1, 1, 6), (1, 2, 2), (3, 1, 10), (2, 3, 4), (2, 1, 11), (0, 3, 13)],
+                 [(0, 0, 12), (0, 1, 0), (0, 1, 1), (0, 1, 5), (1, 0, 9), (1, 0, 12), (1, 3, 9), (1, 3, 12),
+                  (1, 3, 14), (1, 3, 15), (2, 0, 12), (2, 2, 12)]),
+        Position('final 7', 'final',
+                 [14, (2, 1, 1), (3, 1, 10), (1, 2, 7), (2, 0, 11), (0, 0, 2), (0, 1, 5), (0, 3, 6), (2, 2, 8),
+                  (3, 2, 9)],
+                 [(0, 2, 0), (2, 3, 15)]),
+    ],
+}
+
+
+class CountingTicTacToe(TicTacToe):
+    nodes = 0
+
+    def make_move(self, move):
+        CountingTicTacToe.nodes += 1
+        return super().make_move(move)
+
+
+def build(game_name, moves):
+    if game_name == 'tic_tac_toe':
+        game = CountingTicTacToe()
+    elif game_name == 'connect_four':
+        game = CountingConnectFour()
+    else:
+        game = CountingQuarto()
+        game.select_piece(game.all_pieces[moves[0]])
+        moves = moves[1:]
+    for move in moves:
+        game.make_move(move)
+    return game
+
+
+def tic_tac_toe_minimax_engine(game):
+    # Minimax completo (sem a tabela pré-calculada), com tabela de transposição nova a cada busca
+    return counted(game, lambda: tic_tac_toe_minimax(game, tt=TranspositionTable(), use_table=False))
+
+
+BENCH_ENGINES = dict(ENGINES, tic_tac_toe_minimax=tic_tac_toe_minimax_engine)
+
+# Motores medidos em cada jogo: (nome, motor, parâmetros)
+FIELDS = {
+    'tic_tac_toe': [
+        ('minimax', 'tic_tac_toe_minimax', {}),
+        ('mcts 500', 'mcts', {'iterations': 500}),
+    ],
+    'connect_four': [
+        ('minimax d4', 'minimax', {'depth': 4}),
+        ('alphabeta d6', 'alphabeta', {'depth': 6}),
+        ('mcts 500', 'mcts', {'iterations': 500}),
+        ('mcts 500 rave', 'mcts', {'iterations': 500, 'rave': True}),
+    ],
+    'quarto': [
+        ('minimax d1', 'quarto_minimax', {'depth': 1}),
+        ('mcts 500', 'quarto_mcts', {'iterations': 500}),
+        ('solver d1', 'quarto_solver', {'depth': 1}),
+    ],
+}
+
+# Posições em que cada motor tem de acertar a referência em toda execução, com ou sem baseline.
+# Ficam de fora as posições que o motor não resolve no orçamento usado aqui (por exemplo,
+# vitórias forçadas além da profundidade) e, nos MCTS, as que dependem da sorte dos playouts.
+REQUIRED_AGREEMENT = {
+    'tic_tac_toe/minimax': {'canto', 'diagonal', 'vitória imediata', 'bloqueio', 'seis peças'},
+    'tic_tac_toe/mcts 500': {'vitória imediata', 'bloqueio'},
+    'connect_four/minimax d4': {'meio-jogo 18', 'meio-jogo 20', 'vitória imediata', 'bloqueio', 'ameaça dupla',
+                                'final 28', 'final 32'},
+    'connect_four/alphabeta d6': {'vazio', 'meio-jogo 18', 'meio-jogo 20', 'vitória imediata', 'bloqueio',
+                                  'ameaça dupla', 'final 24', 'final 28', 'final 32'},
+    'connect_four/mcts 500': {'vitória imediata', 'bloqueio'},
+    'connect_four/mcts 500 rave': {'vitória imediata', 'bloqueio'},
+    'quarto/minimax d1': {'vitória imediata'},
+    'quarto/mcts 500': {'vitória imediata'},
+    'quarto/solver d1': {'vitória imediata', 'final 9', 'final 8', 'final 7'},
+}
+
+# Casas vazias a partir das quais os métodos exatos são lentos demais para --references
+REFERENCE_EMPTY_CELLS = {'connect_four': 28, 'quarto': 10}
+
+# Profundidades medidas no tempo para chegar a cada profundidade (aberturas e meio-jogo)
+TIME_TO_DEPTH = {'connect_four': 6, 'quarto': 3}
+
+
+def agrees(move, best):
+    if best is None:
+        return None
+    if isinstance(move, tuple):
+        return any(move[:len(b)] == b for b in best)
+    return move in best
+
+
+def encode(move):
+    return list(move) if isinstance(move, tuple) else move
+
+
+def measure(game_name, engine, params, position, repeat, seed):
+    times = []
+    for _ in range(repeat):
+        game = build(game_name, position.moves)
+        random.seed(seed)
+        start = time.perf_counter()
+        move, nodes = BENCH_ENGINES[engine](game, **params)
+        times.append(time.perf_counter() - start)
+    elapsed = min(times)
+    return {
+        'move': encode(move),
+        'nodes': nodes,
+        'time': elapsed,
+        'nodes_per_second': nodes / elapsed if elapsed else 0.0,
+        'agrees': agrees(move, position.best),
+    }
+
+
+def time_to_depth(game_name, position, max_depth, repeat):
+    ''':return: Dicionário profundidade -> segundos até concluir a busca naquela profundidade.'''
+    times = {}
+    for depth in range(1, max_depth + 1):
+        samples = []
+        for _ in range(repeat):
+            game = build(game_name, position.moves)
+            start = time.perf_counter()
+            if game_name == 'connect_four':
+                iterative_deepening(game, evaluate_connect_four_np, max_depth=depth, tt=TranspositionTable(),
+                                    batch_evaluate_fn=evaluate_games_batch)
+            else:
+                QuartoSolver(depth=depth).solve(game)
+            samples.append(time.perf_counter() - start)
+        times[str(depth)] = min(samples)
+    return times
+
+
+def calibrate(repeat=5, playouts=200):
+    '''
+    Tempo (s) de uma carga fixa: partidas aleatórias de Connect Four com semente fixa.
+    A comparação com a baseline corrige as velocidades pela razão entre as calibrações,
+    descontando a diferença de velocidade (ou de carga) da máquina entre as execuções.
+    '''
+    samples = []
+    for _ in range(repeat):
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for _ in range(playouts):
+            game = CountingConnectFour()
+            while not game.game_over():
+                game.make_move(rng.choice(game.available_moves()))
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def run(games=None, repeat=3, seed=2025, verbose=True):
+    calibration = calibrate()
+    results, depths = {}, {}
+    for game_name in games or CORPUS:
+        for position in CORPUS[game_name]:
+            for label, engine, params in FIELDS[game_name]:
+                key = f"{game_name}/{label}/{position.name}"
+                results[key] = measure(game_name, engine, params, position, repeat, seed)
+                if verbose:
+                    print(f"  {key}", file=sys.stderr)
+            if game_name in TIME_TO_DEPTH and position.category in ('abertura', 'meio-jogo'):
+                depths[f"{game_name}/{position.name}"] = time_to_depth(
+                    game_name, position, TIME_TO_DEPTH[game_name], repeat)
+    # Média das calibrações antes e depois das medidas
+    calibration = (calibration + calibrate()) / 2
+    return {
+        'meta': {
+            'calibration': calibration,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'repeat': repeat,
+            'seed': seed,
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'results': results,
+        'time_to_depth': depths,
+    }
+
+
+def disagreement(key, result):
+    return f"{key}: a jogada {result['move']} não está entre as da referência"
+
+
+def check_references(current):
+    ''':return: Lista de erros (mensagens) nas posições de REQUIRED_AGREEMENT.'''
+    errors = []
+    for key, result in current['results'].items():
+        field, position = key.rsplit('/', 1)
+        if position in REQUIRED_AGREEMENT.get(field, ()) and result['agrees'] is False:
+            errors.append(disagreement(key, result))
+    return errors
+
+
+def machine_slowdown(baseline, current):
+    ''':return: Quantas vezes a máquina está mais lenta agora do que na baseline (1 sem calibração).'''
+    if 'calibration' not in baseline['meta']:
+        return 1.0
+    return current['meta']['calibration'] / baseline['meta']['calibration']
+
+
+def compare(baseline, current, tolerance=TOLERANCE):
+    ''':return: Lista de regressões (mensagens) de `current` em relação à `baseline`.'''
+    slowdown = machine_slowdown(baseline, current)
+    regressions = []
+    for key, base in baseline['results'].items():
+        now = current['results'].get(key)
+        if now is None:
+            continue
+        if base['agrees'] and now['agrees'] is False:
+            regressions.append(disagreement(key, now))
+        speed = now['nodes_per_second'] * slowdown
+        if min(base['time'], now['time']) >= MIN_TIME and speed < base['nodes_per_second'] * (1 - tolerance):
+            regressions.append(f"{key}: nós/s {base['nodes_per_second']:.0f} -> {speed:.0f} "
+                               f"({speed / base['nodes_per_second'] - 1:+.0%}, corrigido pela calibração)")
+    for key, base in baseline['time_to_depth'].items():
+        now = current['time_to_depth'].get(key, {})
+        for depth, seconds in base.items():
+            if depth not in now or max(seconds, now[depth]) < MIN_TIME:
+                continue
+            elapsed = now[depth] / slowdown
+            if elapsed > seconds * (1 + tolerance):
+                regressions.append(f"{key}: profundidade {depth} em {seconds:.3f}s -> {elapsed:.3f}s "
+                                   f"({elapsed / seconds - 1:+.0%}, corrigido pela calibração)")
+    return regressions
+
+
+def print_report(current, baseline=None):
+    slowdown = machine_slowdown(baseline, current) if baseline else 1.0
+    print(f"{'posição':<48}{'ms':>9}{'nós':>9}{'nós/s':>10}{'Δ':>7}  {'jogada':<14}ref")
+    for key, r in current['results'].items():
+        base = baseline['results'].get(key) if baseline else None
+        delta = f"{r['nodes_per_second'] * slowdown / base['nodes_per_second'] - 1:+.0%}" \
+            if base and base['nodes_per_second'] else ''
+        ref = {True: 'sim', False: 'NÃO', None: '-'}[r['agrees']]
+        print(f"{key:<48}{1000 * r['time']:>9.1f}{r['nodes']:>9}{r['nodes_per_second']:>10.0f}{delta:>7}  "
+              f"{str(r['move']):<14}{ref}")
+
+    if current['time_to_depth']:
+        print("\nTempo (ms) até cada profundidade:")
+        for key, times in current['time_to_depth'].items():
+            print(f"{key:<48}" + ''.join(f"{f'd{d} {1000 * t:.0f}':>12}" for d, t in times.items()))
+
+    engines = {}
+    for key, r in current['results'].items():
+        if r['agrees'] is not None:
+            engine = key.rsplit('/', 1)[0]
+            hits, total = engines.get(engine, (0, 0))
+            engines[engine] = (hits + r['agrees'], total + 1)
+    print("\nConcordância com a referência:")
+    for engine, (hits, total) in engines.items():
+        print(f"{engine:<48}{hits}/{total}")
+
+
+def reference_moves(game_name, game):
+    '''
+    Jogadas de valor ótimo (métodos exatos), ou None se a posição tem mais casas vazias
+    que REFERENCE_EMPTY_CELLS. Pode levar quase um minuto nas posições de meio-jogo.
+    '''
+    empty = sum(row.count(' ') for row in game.board)
+    if empty > REFERENCE_EMPTY_CELLS.get(game_name, empty):
+        return None
+    values = {}
+    if game_name == 'tic_tac_toe':
+        table = get_table()
+        sign = 1 if game.current == 'X' else -1
+        for move in game.available_moves():
+            game.make_move(move)
+            values[move] = sign * table.value(game.board)
+            game.undo_move()
+    elif game_name == 'connect_four':
+        solver = ConnectFourSolver()
+        for move in game.available_moves():
+            game.make_move(move)
+            values[move] = WIN if game.winner() else 0 if game.full() else -solver.solve(game)
+            game.undo_move()
+    else:
+        solver = QuartoSolver(endgame_squares=16, tt=TranspositionTable())
+        pieces = game.available_piece_indices() or [None]
+        for square in game.available_moves():
+            for piece in pieces:
+                game.make_move(square + (piece,))
+                values[square + (piece,)] = (WIN if game.winner() is not None else 0 if game.full()
+                                             else -solver.solve(game)[1])
+                game.undo_move()
+    best = max(values.values())
+    return sorted(move for move, value in values.items() if value == best)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos motores dos jogos adversariais")
+    parser.add_argument('--games', nargs='+', choices=sorted(CORPUS), default=None)
+    parser.add_argument('--repeat', type=int, default=3, help="execuções por medida (vale a mais rápida)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help="grava os resultados como nova baseline")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="piora relativa tolerada em nós/s e no tempo até cada profundidade")
+    parser.add_argument('--references', action='store_true',
+                        help="recalcula as jogadas de referência e aponta as que diferem do conjunto de posições")
+    args = parser.parse_args()
+
+    if args.references:
+        for game_name in args.games or CORPUS:
+            for position in CORPUS[game_name]:
+                if position.best is None:
+                    continue
+                best = reference_moves(game_name, build(game_name, position.moves))
+                if best is None:
+                    print(f"{game_name}/{position.name}: referência {position.best} não verificada (posição aberta demais)")
+                elif not all(agrees(move, position.best) for move in best) or \
+                        not all(any(agrees(move, [b]) for move in best) for b in position.best):
+                    print(f"{game_name}/{position.name}: referência {position.best}, calculada {best}")
+        sys.exit(0)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    current = run(args.games, args.repeat)
+    print_report(current, None if args.save else baseline)
+
+    regressions = check_references(current)
+    if args.save:
+        if baseline is not None:
+            # Com --games, só as medidas dos jogos executados são substituídas
+            baseline['results'].update(current['results'])
+            baseline['time_to_depth'].update(current['time_to_depth'])
+            baseline['meta'] = current['meta']
+            current = baseline
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+        print(f"\nBaseline gravada em {args.baseline}")
+        against = "às referências"
+    elif baseline is None:
+        print(f"\nSem baseline em {args.baseline} (grave uma com --save): só as referências foram verificadas")
+        against = "às referências"
+    else:
+        # A mesma jogada errada pode aparecer nas duas verificações
+        regressions = list(dict.fromkeys(regressions + compare(baseline, current, args.tolerance)))
+        against = f"às referências e à baseline de {baseline['meta']['date']}"
+
+    if regressions:
+        print(f"\n{'!' * 60}\nREGRESSÕES em relação {against}:")
+        for message in regressions:
+            print(f"  - {message}")
+        print('!' * 60)
+        sys.exit(1)
+    print(f"\nSem regressões em relação {against}")
@@ -14,10 +14,23 @@ class ConnectFour(BoardGame):
         for r in range(self.rows-1, -1, -1):
             if self.board[r][col] == ' ':
                 self.board[r][col] = self.current
+                self.key ^= self.zobrist.squares[r * self.cols + col][0 if self.current == 'X' else 1]
                 self.current = 'O' if self.current == 'X' else 'X'
+                self.history.append(col)
                 return True
         return False
 
+    def amaf_key(self, col):
+        # A casa em que a peça vai cair: a coluna sozinha diz pouco sobre a jogada
+        return next(r for r in range(self.rows - 1, -1, -1) if self.board[r][col] == ' '), col
+
+    def undo_move(self):
+        col = self.history.pop()
+        r = next(r for r in range(self.rows) if self.board[r][col] != ' ')
+        self.current = self.board[r][col]
+        self.key ^= self.zobrist.squares[r * self.cols + col][0 if self.current == 'X' else 1]
+        self.board[r][col] = ' '
+
     def winner(self):
         b = self.board
         for r in range(self.rows):
@@ -37,3 +50,144 @@ class ConnectFour(BoardGame):
                 if b[r][c] != ' ' and all(b[r-i][c+i] == b[r][c] for i in range(4)):
                     return b[r][c]
         return None
+
+
+# Bitboard: cada coluna ocupa H1 = ROWS + 1 bits (o bit extra é uma sentinela
+# que impede que os deslocamentos "vazem" de uma coluna para a seguinte).
+# O bit (col * H1 + h) representa a célula da coluna `col` na altura `h`,
+# contada a partir do fundo do tabuleiro.
+H1 = ROWS + 1
+
+
+def has_four(bitboard):
+    '''
+    Verifica em O(1) se um bitboard contém 4 peças alinhadas, usando
+    deslocamentos e ANDs nas quatro direções (vertical, horizontal e diagonais).
+    '''
+    for shift in (1, H1, H1 - 1, H1 + 1):
+        m = bitboard & (bitboard >> shift)
+        if m & (m >> (2 * shift)):
+            return True
+    return False
+
+
+def position_masks(game):
+    '''Máscaras (peças de 'X', ocupação) de um ConnectFour qualquer, no layout do bitboard.'''
+    if isinstance(game, BitboardConnectFour):
+        return game.masks['X'], game.masks['X'] | game.masks['O']
+    x_mask = mask = 0
+    board = game.board
+    for c in range(COLS):
+        for h in range(ROWS):
+            cell = board[ROWS - 1 - h][c]
+            if cell == ' ':
+                break
+            bit = 1 << (c * H1 + h)
+            mask |= bit
+            if cell == 'X':
+                x_mask |= bit
+    return x_mask, mask
+
+
+class BitboardConnectFour(ConnectFour):
+    '''
+    Variante de ConnectFour representada por bitboards: uma máscara de 64 bits
+    por jogador e a altura de cada coluna. A detecção de vitória é feita
+    apenas para quem acabou de jogar, em tempo constante, e o resultado fica
+    armazenado em `_winner`.
+
+    O atributo `board` continua disponível (como lista de listas) para a
+    função de avaliação e para a impressão do tabuleiro, de modo que a classe
+    pode substituir ConnectFour em minimax_with_hef, mcts e nos scripts play_*.
+    Ele é mantido junto com as máscaras (uma casa por jogada), porque as buscas
+    o leem em toda folha; não deve ser alterado diretamente.
+    '''
+    def __init__(self):
+        super().__init__()
+
+    @property
+    def board(self):
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        '''
+        Carrega o estado a partir de um tabuleiro em lista de listas
+        (linha 0 no topo), como o usado por ConnectFour.
+        '''
+        self._board = [list(row) for row in board]
+        self.masks = {'X': 0, 'O': 0}
+        self.heights = [c * H1 for c in range(self.cols)]
+        self.moves_played = 0
+        self.key = 0
+        self.history = []
+        for c in range(self.cols):
+            for r in range(self.rows - 1, -1, -1):
+                cell = board[r][c]
+                if cell == ' ':
+                    break
+                self.masks[cell] |= 1 << self.heights[c]
+                self.heights[c] += 1
+                self.moves_played += 1
+                self.key ^= self.zobrist.squares[r * self.cols + c][0 if cell == 'X' else 1]
+        self._winner = next((p for p, m in self.masks.items() if has_four(m)), None)
+
+    def available_moves(self):
+        return [c for c in range(self.cols) if self.heights[c] < c * H1 + self.rows]
+
+    def make_move(self, col):
+        if not (0 <= col < self.cols) or self.heights[col] >= col * H1 + self.rows:
+            return False
+        player = self.current
+        h = self.heights[col] - col * H1
+        self.masks[player] |= 1 << self.heights[col]
+        self.heights[col] += 1
+        self._board[self.rows - 1 - h][col] = player
+        self.key ^= self.zobrist.squares[(self.rows - 1 - h) * self.cols + col][0 if player == 'X' else 1]
+        self.moves_played += 1
+        if self._winner is None and has_four(self.masks[player]):
+            self._winner = player
+        self.current = 'O' if player == 'X' else 'X'
+        self.history.append(col)
+        return True
+
+    def amaf_key(self, col):
+        # Índice do bit da casa em que a peça vai cair
+        return self.heights[col]
+
+    def undo_move(self):
+        col = self.history.pop()
+        player = 'O' if self.current == 'X' else 'X'
+        self.heights[col] -= 1
+        h = self.heights[col] - col * H1
+        self.masks[player] ^= 1 << self.heights[col]
+        self._board[self.rows - 1 - h][col] = ' '
+        self.moves_played -= 1
+        self.key ^= self.zobrist.squares[(self.rows - 1 - h) * self.cols + col][0 if player == 'X' else 1]
+        if self._winner is not None and not has_four(self.masks[self._winner]):
+            self._winner = None
+        self.current = player
+
+    def winner(self):
+        return self._winner
+
+    def full(self):
+        return self.moves_played == self.rows * self.cols
+
+    def game_over(self):
+        return self._winner is not None or self.moves_played == self.rows * self.cols
+
+    def copy(self):
+        new = object.__new__(self.__class__)
+        new.rows = self.rows
+        new.cols = self.cols
+        new.current = self.current
+        new.zobrist = self.zobrist
+        new.key = self.key
+        new.masks = self.masks.copy()
+        new.heights = self.heights.copy()
+        new._board = [row.copy() for row in self._board]
+        new.moves_played = self.moves_played
+        new._winner = self._winner
+        new.history = self.history.copy()
+        return new
@@ -0,0 +1,196 @@
+import argparse
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+
+from connect_four import BitboardConnectFour, COLS, H1, position_masks
+from connect_four_eval import evaluate_connect_four_np, evaluate_games_batch
+from minimax import iterative_deepening
+from process_pool import get_pool
+from transposition import TranspositionTable
+
+'''
+Livro de aberturas do Connect Four.
+
+O construtor (offline) enumera todas as posições alcançáveis até N lances a
+partir do tabuleiro vazio, faz uma busca alfa-beta profunda em cada uma e grava
+num arquivo binário, ordenado pela chave, a melhor coluna e o valor (do ponto
+de vista de quem joga).
+
+A chave de uma posição é única (sem colisões): as peças de 'X' somadas à
+máscara de ocupação e ao bit da base de cada coluna, no layout de bits do
+BitboardConnectFour. Ela é reduzida pelo espelhamento horizontal (a menor
+entre a chave da posição e a da posição espelhada), de modo que o livro guarda
+cada par de posições espelhadas uma única vez.
+
+Formato do arquivo: cabeçalho (b'C4BK', quantidade n), n chaves uint64
+ordenadas, n valores int32 e n colunas int8, na ordem de bytes da máquina.
+A consulta mapeia o arquivo com mmap e faz busca binária diretamente sobre
+ele, sem carregá-lo na memória: vários processos compartilham as mesmas
+páginas do livro.
+'''
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'connect_four_book.bin')
+
+MAGIC = b'C4BK'
+HEADER = struct.Struct('<4sI')
+BOTTOM = sum(1 << (c * H1) for c in range(COLS))
+COLUMN = (1 << H1) - 1
+
+
+def mirror(key):
+    '''Chave da posição espelhada (colunas em ordem inversa).'''
+    mirrored = 0
+    for c in range(COLS):
+        mirrored |= ((key >> (c * H1)) & COLUMN) << ((COLS - 1 - c) * H1)
+    return mirrored
+
+
+def canonical_key(game):
+    '''
+    :return: Tupla (chave canônica, espelhada), em que `espelhada` indica que a
+             forma canônica é a posição espelhada (e as colunas devem ser invertidas).
+    '''
+    x_mask, mask = position_masks(game)
+    key = x_mask + mask + BOTTOM
+    mirrored = mirror(key)
+    return (mirrored, True) if mirrored < key else (key, False)
+
+
+def enumerate_positions(plies):
+    '''
+    Posições alcançáveis com até `plies` lances e ainda não terminadas, uma por
+    classe de espelhamento. :return: dicionário chave canônica -> lances (colunas).
+    '''
+    positions = {}
+    game = BitboardConnectFour()
+
+    def visit(remaining):
+        key, _ = canonical_key(game)
+        if key in positions or game.game_over():
+            return
+        positions[key] = list(game.history)
+        if remaining:
+            for col in game.available_moves():
+                game.make_move(col)
+                visit(remaining - 1)
+                game.undo_move()
+
+    visit(plies)
+    return positions
+
+
+def search_position(moves, depth):
+    '''Melhor coluna e valor da posição obtida jogando `moves` a partir do tabuleiro vazio.'''
+    game = BitboardConnectFour()
+    for col in moves:
+        game.make_move(col)
+    move, score, _ = iterative_deepening(
+        game, evaluate_connect_four_np, max_depth=depth, tt=_build_tt(),
+        batch_evaluate_fn=evaluate_games_batch
+    )
+    _, mirrored = canonical_key(game)
+    return (COLS - 1 - move if mirrored else move), score
+
+
+_tt = None
+
+def _build_tt():
+    # Uma tabela por processo, compartilhada entre as posições buscadas por ele
+    global _tt
+    if _tt is None:
+        _tt = TranspositionTable()
+    return _tt
+
+
+def build(plies=4, depth=8, path=DEFAULT_PATH, workers=1):
+    '''
+    Gera o livro com todas as posições até `plies` lances, cada uma buscada com
+    alfa-beta até a profundidade `depth`, e o grava em `path`.
+    :return: Quantidade de posições no livro.
+    '''
+    positions = enumerate_positions(plies)
+    keys = sorted(positions)
+    if workers > 1:
+        pool = get_pool(workers)
+        futures = [pool.submit(search_position, positions[key], depth) for key in keys]
+        results = [future.result() for future in futures]
+    else:
+        results = [search_position(positions[key], depth) for key in keys]
+
+    # Grava num arquivo temporário e o renomeia: truncar o livro enquanto outro processo o
+    # tem mapeado derruba esse processo (SIGBUS) na próxima consulta, e um erro no meio da
+    # gravação deixaria um livro pela metade
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.bin')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(keys)))
+            f.write(array('Q', keys).tobytes())
+            f.write(array('i', [int(score) for _, score in results]).tobytes())
+            f.write(array('b', [move for move, _ in results]).tobytes())
+        # mkstemp cria o arquivo legível só pelo dono; o livro é lido por outros processos
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return len(keys)
+
+
+class OpeningBook:
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, 'rb') as f:
+            # Arquivo vazio: o próprio mmap levanta ValueError
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self._mmap)
+        magic, n = HEADER.unpack_from(self._mmap, 0) if size >= HEADER.size else (None, 0)
+        if magic != MAGIC or size != HEADER.size + 13 * n:
+            self._mmap.close()
+            raise ValueError(f"{path} não é um livro de aberturas do Connect Four válido")
+        view = self._view = memoryview(self._mmap)
+        start = HEADER.size
+        # Visões sobre as páginas mapeadas: nada é copiado para a memória do processo
+        self.keys = view[start:start + 8 * n].cast('Q')
+        self.scores = view[start + 8 * n:start + 12 * n].cast('i')
+        self.moves = view[start + 12 * n:start + 13 * n].cast('b')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def probe(self, game):
+        ''':return: Tupla (coluna, valor) para a posição de `game`, ou None se ela não está no livro.'''
+        key, mirrored = canonical_key(game)
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        move = self.moves[i]
+        return (COLS - 1 - move if mirrored else move), self.scores[i]
+
+    def close(self):
+        self.keys.release()
+        self.scores.release()
+        self.moves.release()
+        self._view.release()
+        self._mmap.close()
+
+
+def load_book(path=DEFAULT_PATH):
+    '''Abre o livro em `path`, ou retorna None se ele ainda não foi gerado ou está corrompido.'''
+    try:
+        return OpeningBook(path)
+    except (OSError, ValueError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o livro de aberturas do Connect Four")
+    parser.add_argument('--plies', type=int, default=4, help="lances a partir do tabuleiro vazio")
+    parser.add_argument('--depth', type=int, default=8, help="profundidade da busca em cada posição")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--output', default=DEFAULT_PATH)
+    args = parser.parse_args()
+    n = build(args.plies, args.depth, args.output, args.workers)
+    print(f"{n} posições gravadas em {args.output}")
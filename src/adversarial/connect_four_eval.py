@@ -0,0 +1,104 @@
+import numpy as np
+
+from connect_four import ROWS, COLS, H1
+
+'''
+Versão vetorizada (NumPy) de evaluate_connect_four.
+
+O tabuleiro é achatado em um vetor int8 de ROWS * COLS casas, codificadas como
+0 (vazia), 1 (peça do jogador) e 5 (peça do oponente). Assim, a soma de uma
+janela de 4 casas identifica unicamente quantas peças de cada lado ela contém
+(soma = jogador + 5 * oponente), e a pontuação de todas as janelas é obtida
+com uma indexação pela tabela WINDOWS seguida de uma consulta em SCORE_BY_SUM.
+'''
+
+EMPTY, MINE, THEIRS = 0, 1, 5
+
+
+def _windows(rows, cols):
+    # Mesma ordem de evaluate_connect_four: horizontais, verticais, diagonais \ e /
+    windows = []
+    for r in range(rows):
+        for c in range(cols - 3):
+            windows.append([r * cols + c + i for i in range(4)])
+    for r in range(rows - 3):
+        for c in range(cols):
+            windows.append([(r + i) * cols + c for i in range(4)])
+    for r in range(rows - 3):
+        for c in range(cols - 3):
+            windows.append([(r + i) * cols + c + i for i in range(4)])
+    for r in range(3, rows):
+        for c in range(cols - 3):
+            windows.append([(r - i) * cols + c + i for i in range(4)])
+    return np.array(windows, dtype=np.intp)
+
+
+# Índices (69 x 4) das casas de cada janela no tabuleiro achatado
+WINDOWS = _windows(ROWS, COLS)
+
+# Pontuação de uma janela em função da soma de suas casas (mesmos pesos de evaluate_connect_four)
+SCORE_BY_SUM = np.zeros(4 * THEIRS + 1, dtype=np.int32)
+SCORE_BY_SUM[4 * MINE] = 1000
+SCORE_BY_SUM[3 * MINE] = 50
+SCORE_BY_SUM[2 * MINE] = 10
+SCORE_BY_SUM[3 * THEIRS] = -80
+
+# Posição do bit de cada casa (linha 0 no topo) em BitboardConnectFour
+BIT_SHIFTS = np.array([c * H1 + (ROWS - 1 - r) for r in range(ROWS) for c in range(COLS)], dtype=np.uint64)
+
+
+def encode_board(board, player):
+    '''
+    Codifica um tabuleiro em lista de listas como vetor int8 achatado.
+    '''
+    cells = np.array(board).ravel()
+    encoded = np.full(cells.shape, THEIRS, dtype=np.int8)
+    encoded[cells == player] = MINE
+    encoded[cells == ' '] = EMPTY
+    return encoded
+
+
+def encode_game(game, player):
+    '''
+    Codifica o estado de um jogo. Para BitboardConnectFour a codificação é
+    feita diretamente a partir das máscaras de bits, sem materializar o tabuleiro.
+    '''
+    if not hasattr(game, 'masks'):
+        return encode_board(game.board, player)
+    opponent = 'O' if player == 'X' else 'X'
+    mine = (np.uint64(game.masks[player]) >> BIT_SHIFTS) & np.uint64(1)
+    theirs = (np.uint64(game.masks[opponent]) >> BIT_SHIFTS) & np.uint64(1)
+    return (mine * MINE + theirs * THEIRS).astype(np.int8)
+
+
+def evaluate_connect_four_np(board, player):
+    '''
+    Substituto direto de evaluate_connect_four(board, player), com o mesmo resultado.
+    '''
+    encoded = encode_board(board, player)
+    return int(SCORE_BY_SUM[encoded[WINDOWS].sum(axis=1)].sum())
+
+
+def evaluate_connect_four_batch(boards, player):
+    '''
+    Avalia N tabuleiros de uma só vez, do ponto de vista de `player`.
+
+    :param boards: Sequência de tabuleiros em lista de listas, ou array int8 já
+                   codificado com formato (N, ROWS * COLS) ou (N, ROWS, COLS).
+    :return: Array (N,) com as pontuações.
+    '''
+    if isinstance(boards, np.ndarray):
+        encoded = boards.reshape(len(boards), -1)
+    else:
+        encoded = np.array([encode_board(b, player) for b in boards], dtype=np.int8).reshape(len(boards), -1)
+    # (N, 69, 4) -> soma por janela -> pontuação por janela -> soma por tabuleiro
+    return SCORE_BY_SUM[encoded[:, WINDOWS].sum(axis=2)].sum(axis=1)
+
+
+def evaluate_games_batch(games, player):
+    '''
+    Avalia em lote uma lista de jogos (p.ex. todas as folhas de um nó de
+    profundidade 1). Pode ser passada como batch_evaluate_fn às buscas de minimax.py.
+    '''
+    encoded = np.array([encode_game(g, player) for g in games], dtype=np.int8)
+    return evaluate_connect_four_batch(encoded, player)
@@ -0,0 +1,78 @@
+import random
+
+import numpy as np
+
+from connect_four import ROWS, COLS, H1, position_masks
+
+'''
+Simulações (rollouts) do Connect Four em lote, vetorizadas com NumPy.
+
+Todas as partidas do lote partem da mesma folha e avançam juntas, um lance por
+vez: cada partida é um par de bitboards uint64 (layout do BitboardConnectFour)
+mais a altura de cada coluna. A cada lance, as colunas livres formam uma
+máscara (n x COLS), a coluna de cada partida é sorteada entre as livres e a
+vitória é verificada com deslocamentos sobre o vetor de bitboards. Partidas
+que já terminaram são mantidas no lote, mas deixam de ser alteradas.
+
+O custo em Python é o de um lance por jogada do lote (no máximo 42), e não o
+de uma partida inteira por simulação.
+'''
+
+TOPS = np.array([c * H1 + ROWS for c in range(COLS)], dtype=np.int64)
+SHIFTS = [np.uint64(s) for s in (1, H1, H1 - 1, H1 + 1)]
+ONE = np.uint64(1)
+
+
+def has_four_batch(bitboards):
+    '''Versão vetorizada de connect_four.has_four: um booleano por bitboard.'''
+    found = np.zeros(bitboards.shape, dtype=bool)
+    for shift in SHIFTS:
+        m = bitboards & (bitboards >> shift)
+        found |= (m & (m >> (shift + shift))) != 0
+    return found
+
+
+class BatchRollout:
+    '''
+    Avaliador de folhas para mcts.search: joga `batch_size` partidas aleatórias a
+    partir da posição e retorna o resultado médio do ponto de vista de 'X'
+    (+1 vitória de 'X', -1 vitória de 'O', 0 empate), em [-1, 1].
+    '''
+    def __init__(self, batch_size=64):
+        self.batch_size = batch_size
+
+    def __call__(self, game):
+        n = self.batch_size
+        x_mask, mask = position_masks(game)
+        mover_mask = x_mask if game.current == 'X' else x_mask ^ mask
+        # A semente vem de `random`, que o MCTS paralelo inicializa de forma diferente em cada processo
+        rng = np.random.default_rng(random.getrandbits(64))
+
+        mover = np.full(n, mover_mask, dtype=np.uint64)
+        other = np.full(n, mover_mask ^ mask, dtype=np.uint64)
+        heights = np.array([c * H1 + bin((mask >> (c * H1)) & ((1 << ROWS) - 1)).count('1')
+                            for c in range(COLS)], dtype=np.int64)
+        heights = np.tile(heights, (n, 1))
+        active = np.ones(n, dtype=bool)
+        # Resultado do ponto de vista de quem joga na posição inicial
+        result = np.zeros(n, dtype=np.int8)
+        rows = np.arange(n)
+        sign = 1
+
+        for _ in range(ROWS * COLS - bin(mask).count('1')):
+            free = heights < TOPS
+            choice = np.where(free, rng.random((n, COLS)), -1.0).argmax(axis=1)
+            bits = ONE << heights[rows, choice].astype(np.uint64)
+            mover |= np.where(active, bits, np.uint64(0))
+            heights[rows, choice] += active
+
+            won = active & has_four_batch(mover)
+            result[won] = sign
+            active &= ~won
+            if not active.any():
+                break
+            mover, other = other, mover
+            sign = -sign
+
+        value = result.mean()
+        return value if game.current == 'X' else -value
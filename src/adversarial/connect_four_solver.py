@@ -0,0 +1,189 @@
+from connect_four import ROWS, COLS, H1, position_masks
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+'''
+Solucionador exato do Connect Four.
+
+Negamax com poda alfa-beta sobre bitboards (layout do BitboardConnectFour:
+peças de quem joga e máscara de ocupação), com janelas nulas: o valor exato
+é encontrado por busca binária sobre o placar, e cada passo só pergunta se o
+valor é maior que um limite (janela [med, med + 1]). Os limites vêm do próprio
+placar (ninguém vence antes de colocar a quarta peça), de uma tabela de
+transposição e da poda de jogadas perdedoras (que deixam o oponente vencer
+no lance seguinte).
+
+O placar segue a convenção usual: vencer com a última peça do tabuleiro vale
+1, e cada peça a menos que o vencedor precisou vale 1 a mais; derrotas têm
+placar negativo e o empate vale 0. Tudo do ponto de vista de quem joga.
+'''
+
+SIZE = ROWS * COLS
+
+BOTTOM = sum(1 << (c * H1) for c in range(COLS))
+BOARD_MASK = BOTTOM * ((1 << ROWS) - 1)
+COLUMN_ORDER = sorted(range(COLS), key=lambda c: abs(COLS // 2 - c))
+COLUMN_MASKS = [((1 << ROWS) - 1) << (c * H1) for c in range(COLS)]
+# Multiplicador ímpar: espalha as chaves (únicas) pelos buckets da tabela sem colisões
+KEY_MULTIPLIER = 0x9E3779B97F4A7C15
+KEY_BITS = (1 << 64) - 1
+
+
+def winning_cells(position, mask):
+    '''Casas vazias (jogáveis ou não) que completariam 4 em linha para as peças de `position`.'''
+    # vertical
+    r = (position << 1) & (position << 2) & (position << 3)
+    for shift in (H1, H1 - 1, H1 + 1):
+        # horizontal e diagonais: a casa pode estar na ponta ou no meio do alinhamento
+        p = (position << shift) & (position << 2 * shift)
+        r |= p & (position << 3 * shift)
+        r |= p & (position >> shift)
+        p = (position >> shift) & (position >> 2 * shift)
+        r |= p & (position << shift)
+        r |= p & (position >> 3 * shift)
+    return r & (BOARD_MASK ^ mask)
+
+
+def popcount(x):
+    return bin(x).count('1')
+
+
+class ConnectFourSolver:
+    def __init__(self, tt=None):
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.nodes = 0
+
+    def negamax(self, position, mask, moves, alpha, beta):
+        '''
+        Placar de quem joga, limitado à janela: retorna um limite superior se o valor
+        é <= alpha e um limite inferior se é >= beta. Pressupõe que quem joga não
+        vence no lance imediato.
+        '''
+        self.nodes += 1
+        possible = (mask + BOTTOM) & BOARD_MASK
+        opponent_wins = winning_cells(position ^ mask, mask)
+        forced = possible & opponent_wins
+        if forced:
+            if forced & (forced - 1):
+                return -((SIZE - moves) // 2)  # duas ameaças imediatas do oponente
+            possible = forced
+        # Jogar logo abaixo de uma casa vencedora do oponente a torna jogável para ele
+        possible &= ~(opponent_wins >> 1)
+        if not possible:
+            return -((SIZE - moves) // 2)
+        if moves >= SIZE - 2:
+            return 0
+
+        # Limites dados pelo placar: não dá para perder no lance seguinte nem vencer no próximo
+        low = -((SIZE - 2 - moves) // 2)
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+        high = (SIZE - 1 - moves) // 2
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        key = ((position + mask + BOTTOM) * KEY_MULTIPLIER) & KEY_BITS
+        depth = SIZE - moves
+        cached, hint = self.tt.probe(key, depth, alpha, beta)
+        if cached is not None:
+            return cached
+
+        # Ordenação: jogada da tabela, depois as que criam mais ameaças; empate pelo centro
+        candidates = []
+        for c in COLUMN_ORDER:
+            move = possible & COLUMN_MASKS[c]
+            if move:
+                threats = popcount(winning_cells(position | move, mask))
+                candidates.append((c != hint, -threats, len(candidates), c, move))
+        candidates.sort()
+
+        alpha_orig = alpha
+        best_col = None
+        for _, _, _, c, move in candidates:
+            score = -self.negamax(position ^ mask, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                self.tt.store(key, depth, score, LOWER, c)
+                return score
+            if score > alpha:
+                alpha, best_col = score, c
+        self.tt.store(key, depth, alpha, UPPER if alpha <= alpha_orig else EXACT, best_col)
+        return alpha
+
+    def solve_masks(self, position, mask, moves):
+        '''Placar exato da posição, por busca binária com janelas nulas (MTD sobre o placar).'''
+        if winning_cells(position, mask) & (mask + BOTTOM) & BOARD_MASK:
+            return (SIZE + 1 - moves) // 2
+        low = -((SIZE - moves) // 2)
+        high = (SIZE + 1 - moves) // 2
+        while low < high:
+            med = low + (high - low) // 2
+            # Testa primeiro perto de 0: empates e resultados próximos são resolvidos mais rápido
+            if med <= 0 and -(-low // 2) < med:
+                med = -(-low // 2)
+            elif med >= 0 and high // 2 > med:
+                med = high // 2
+            score = self.negamax(position, mask, moves, med, med + 1)
+            if score <= med:
+                high = score
+            else:
+                low = score
+        return low
+
+    def solve(self, game):
+        '''Placar exato de `game` (ConnectFour ou BitboardConnectFour) para quem joga.'''
+        if game.game_over():
+            raise ValueError("A partida já terminou.")
+        x_mask, mask = position_masks(game)
+        position = x_mask if game.current == 'X' else x_mask ^ mask
+        return self.solve_masks(position, mask, popcount(mask))
+
+    def best_move(self, game):
+        ''':return: Tupla (coluna, placar) com a melhor jogada e o placar exato da posição.'''
+        x_mask, mask = position_masks(game)
+        position = x_mask if game.current == 'X' else x_mask ^ mask
+        moves = popcount(mask)
+        possible = (mask + BOTTOM) & BOARD_MASK
+        wins = winning_cells(position, mask) & possible
+        best_col, best_score = None, None
+        for c in COLUMN_ORDER:
+            move = possible & COLUMN_MASKS[c]
+            if not move:
+                continue
+            if move & wins:
+                return c, (SIZE + 1 - moves) // 2
+            if moves + 1 == SIZE:
+                score = 0
+            else:
+                score = -self.solve_masks(position ^ mask, mask | move, moves + 1)
+            if best_score is None or score > best_score:
+                best_col, best_score = c, score
+        return best_col, best_score
+
+
+def outcome(game, score):
+    '''
+    Traduz o placar de solve/best_move em (resultado, lances): 'vitória', 'derrota'
+    ou 'empate' para quem joga em `game`, e quantos lances (das duas partes, contando
+    o lance vencedor) faltam para o fim com jogo perfeito.
+    '''
+    moves = sum(1 for row in game.board for cell in row if cell != ' ')
+    if score > 0:
+        # O vencedor termina com (SIZE // 2 + 1 - placar) peças
+        own = moves // 2
+        return 'vitória', 2 * (SIZE // 2 + 1 - score - own) - 1
+    if score < 0:
+        opponent = (moves + 1) // 2
+        return 'derrota', 2 * (SIZE // 2 + 1 + score - opponent)
+    return 'empate', SIZE - moves
+
+
+def solve(game, tt=None):
+    '''
+    Resolve a posição: :return: Tupla (melhor coluna, placar, resultado, lances),
+    por exemplo (3, 2, 'vitória', 7).
+    '''
+    col, score = ConnectFourSolver(tt).best_move(game)
+    return (col, score) + outcome(game, score)
@@ -0,0 +1,156 @@
+'''
+Cliente de teste do game_server: joga uma partida pelo terminal ou simula
+muitas sessões simultâneas (jogadas humanas aleatórias) e mostra as métricas
+do servidor ao final.
+
+Uso:
+    python game_client.py play connect_four [--engine mcts] [--human O]
+    python game_client.py load quarto --games 200 [--connections 10]
+'''
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+
+from game_server import DEFAULT_PORT
+
+
+class GameClient:
+    '''Conexão com o servidor; as requisições podem ser feitas em paralelo (respostas casadas pelo id).'''
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count(1)
+        self.pending = {}
+        self.listener = asyncio.create_task(self.listen())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=DEFAULT_PORT):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def listen(self):
+        while line := await self.reader.readline():
+            response = json.loads(line)
+            future = self.pending.pop(response.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self.pending.values():
+            future.set_exception(ConnectionError("Conexão encerrada pelo servidor."))
+
+    async def request(self, op, **fields):
+        request_id = next(self.ids)
+        future = self.pending[request_id] = asyncio.get_running_loop().create_future()
+        self.writer.write((json.dumps({'op': op, 'id': request_id, **fields}) + '\n').encode())
+        await self.writer.drain()
+        response = await future
+        if not response['ok']:
+            raise ValueError(response['error'])
+        return response
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.listener.cancel()
+
+
+def legal_moves(game_name, state):
+    '''Jogadas legais a partir do estado enviado pelo servidor.'''
+    board = state['board']
+    if game_name == 'connect_four':
+        return [c for c in range(len(board[0])) if board[0][c] == ' ']
+    if game_name == 'tic_tac_toe':
+        return [[r, c] for r in range(3) for c in range(3) if board[r][c] == ' ']
+    pieces = state['available'] or [None]
+    return [[r, c, p] for r in range(4) for c in range(4) if board[r][c] is None for p in pieces]
+
+
+def print_state(game_name, state):
+    for row in state['board']:
+        print('|' + '|'.join('  ' if cell is None else f'{cell:>2}' if game_name == 'quarto' else cell
+                             for cell in row) + '|')
+    if game_name == 'quarto':
+        print(f"Peça a colocar: {state['selected']}   Disponíveis: {state['available']}")
+
+
+def parse_move(game_name, text):
+    values = [int(v) for v in text.replace(',', ' ').split()]
+    if game_name == 'connect_four':
+        return values[0]
+    if game_name == 'quarto' and len(values) == 2:
+        return values + [None]
+    return values
+
+
+async def play(game_name, engine, human, host, port):
+    client = await GameClient.connect(host, port)
+    loop = asyncio.get_running_loop()
+    response = await client.request('new', game=game_name, engine=engine, human=human)
+    session, state = response['session'], response['state']
+    if response['ai_move'] is not None:
+        print(f"IA joga {response['ai_move']}")
+    hint = {'tic_tac_toe': "linha coluna", 'connect_four': "coluna", 'quarto': "linha coluna peça"}[game_name]
+
+    while not state['over']:
+        print_state(game_name, state)
+        text = await loop.run_in_executor(None, input, f"Sua jogada ({hint}): ")
+        try:
+            response = await client.request('move', session=session, move=parse_move(game_name, text))
+        except (ValueError, IndexError) as e:
+            print(e)
+            continue
+        state = response['state']
+        if response['ai_move'] is not None:
+            print(f"IA joga {response['ai_move']}")
+
+    print_state(game_name, state)
+    winner = state['winner']
+    print("Empate." if winner is None else "Você venceu!" if winner == human else "A IA venceu.")
+    await client.close()
+
+
+async def bot_game(client, game_name, engine, rng):
+    human = rng.choice([0, 1] if game_name == 'quarto' else ['X', 'O'])
+    response = await client.request('new', game=game_name, engine=engine, human=human)
+    session, state = response['session'], response['state']
+    while not state['over']:
+        move = rng.choice(legal_moves(game_name, state))
+        state = (await client.request('move', session=session, move=move))['state']
+    await client.request('close', session=session)
+    return state['winner']
+
+
+async def load(game_name, engine, games, connections, host, port, seed=0):
+    '''Joga `games` partidas simultâneas, distribuídas em `connections` conexões.'''
+    rng = random.Random(seed)
+    clients = [await GameClient.connect(host, port) for _ in range(connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*(bot_game(clients[i % connections], game_name, engine, rng) for i in range(games)))
+    elapsed = time.perf_counter() - start
+    metrics = (await clients[0].request('metrics'))['metrics']
+    for client in clients:
+        await client.close()
+    print(f"{games} partidas em {elapsed:.1f}s")
+    print(json.dumps(metrics, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cliente de teste do servidor de partidas")
+    parser.add_argument('mode', choices=['play', 'load'])
+    parser.add_argument('game', choices=['tic_tac_toe', 'connect_four', 'quarto'])
+    parser.add_argument('--engine', default=None)
+    parser.add_argument('--human', default=None, help="lado do humano no modo play ('X'/'O', ou 0/1 no Quarto)")
+    parser.add_argument('--games', type=int, default=100, help="partidas simultâneas no modo load")
+    parser.add_argument('--connections', type=int, default=10)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    if args.mode == 'play':
+        human = args.human or ('0' if args.game == 'quarto' else 'X')
+        human = int(human) if args.game == 'quarto' else human.upper()
+        asyncio.run(play(args.game, args.engine, human, args.host, args.port))
+    else:
+        asyncio.run(load(args.game, args.engine, args.games, min(args.connections, args.games),
+                         args.host, args.port))
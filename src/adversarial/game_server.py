@@ -0,0 +1,429 @@
+'''
+Servidor de partidas humano vs IA (asyncio), com muitas sessões simultâneas de
+Tic-Tac-Toe, Connect Four e Quarto.
+
+Protocolo: JSON por linhas sobre TCP. Cada requisição é um objeto numa linha,
+com o campo "op" e um "id" opcional, devolvido na resposta (as requisições de
+uma mesma conexão são atendidas em paralelo, então as respostas podem chegar
+fora de ordem):
+
+    {"op": "new", "game": "connect_four", "engine": "alphabeta", "human": "X"}
+    {"op": "move", "session": 1, "move": 3}
+    {"op": "state", "session": 1}
+    {"op": "close", "session": 1}
+    {"op": "metrics"}
+
+As jogadas seguem o formato dos jogos: [linha, coluna] no Tic-Tac-Toe, a
+coluna no Connect Four e [linha, coluna, peça entregue] no Quarto (peça null
+na última colocação). Em "new", "human" é 'X' ou 'O' (0 ou 1 no Quarto); se a
+IA começa, a resposta já traz a jogada dela. A resposta de "move" traz a
+jogada da IA em "ai_move" e o estado da partida em "state".
+
+As buscas rodam num pool de processos (process_pool.get_pool) com no máximo
+`max_pending` buscas submetidas ao mesmo tempo; as demais esperam na fila do
+servidor. Cada jogada da IA tem um prazo (`deadline` segundos, contados desde a
+chegada da requisição): o motor recebe uma fração do tempo que sobra como
+limite de busca e, se o resultado não chegar a tempo (fila cheia ou busca
+lenta), a IA joga uma jogada de reserva barata calculada no próprio servidor.
+O mesmo vale se a busca falhar com uma exceção. Uma busca atrasada nunca
+bloqueia as outras sessões, e toda requisição recebe resposta, mesmo quando
+algo inesperado dá errado.
+
+"metrics" retorna o tamanho da fila, as buscas em andamento, as buscas que
+falharam ("errors") e as latências
+(p50, p95 e máxima, em ms) das últimas jogadas da IA.
+
+Uso: python game_server.py [--port N] [--workers N] [--max-pending N] [--deadline S]
+'''
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'q2.2'))
+
+from tic_tac_toe import TicTacToe
+from minimax import best_move as tic_tac_toe_move
+from connect_four import BitboardConnectFour
+from connect_four_book import load_book
+from mcts import mcts
+from minimax import order_moves
+from play_connect_four_minimax_with_hef import best_move as connect_four_move
+from process_pool import get_pool
+
+from quarto_bitboard import BitboardQuarto
+from mcts_quarto import quarto_mcts, ranked_moves
+from quarto_solver import best_move_alphabeta
+
+DEFAULT_PORT = 8765
+# Fração do tempo restante até o prazo que o motor pode usar na busca; o resto
+# cobre a troca de mensagens com o processo
+SEARCH_FRACTION = 0.8
+# Orçamento de iterações do MCTS do Quarto, que precisa de um número: quem limita é o tempo
+QUARTO_ITERATIONS = 10 ** 6
+LATENCY_WINDOW = 1000
+
+
+# Criação dos jogos e conversão das jogadas e do estado para JSON
+def new_quarto():
+    game = BitboardQuarto()
+    game.select_piece(random.choice(game.all_pieces))
+    return game
+
+
+# Os decodificadores exigem int de verdade: no JSON, true/false viram bool, e True == 1
+def is_int(value):
+    return type(value) is int
+
+
+def decode_tic_tac_toe(move):
+    if not (isinstance(move, list) and len(move) == 2 and all(map(is_int, move))):
+        raise TypeError("Jogada deve ser [linha, coluna].")
+    return tuple(move)
+
+
+def decode_connect_four(move):
+    if not is_int(move):
+        raise TypeError("Jogada deve ser o número da coluna.")
+    return move
+
+
+def decode_quarto(move):
+    if not (isinstance(move, list) and len(move) == 3 and is_int(move[0]) and is_int(move[1])
+            and (move[2] is None or is_int(move[2]))):
+        raise TypeError("Jogada deve ser [linha, coluna, peça].")
+    return tuple(move)
+
+
+def board_state(game):
+    return {'board': game.board, 'current': game.current}
+
+
+def quarto_state(game):
+    return {
+        'board': [[game.squares[r * 4 + c] for c in range(4)] for r in range(4)],
+        'current': game.current,
+        'selected': game.selected,
+        'available': game.available_piece_indices(),
+    }
+
+
+def legal_quarto_move(game, move):
+    row, col, piece = move
+    pieces = game.available_piece_indices()
+    return ((row, col) in game.available_moves()
+            and (piece in pieces or (piece is None and not pieces)))
+
+
+GAMES = {
+    'tic_tac_toe': (TicTacToe, decode_tic_tac_toe, board_state, lambda g, m: m in g.available_moves()),
+    'connect_four': (BitboardConnectFour, decode_connect_four, board_state, lambda g, m: m in g.available_moves()),
+    'quarto': (new_quarto, decode_quarto, quarto_state, legal_quarto_move),
+}
+
+
+# Motores, executados nos processos do pool: recebem o jogo e o limite de tempo
+_book = None
+
+def _connect_four_book():
+    # Um livro de aberturas (mmap) por processo, aberto na primeira busca
+    global _book
+    if _book is None:
+        _book = load_book() or False
+    return _book or None
+
+
+ENGINES = {
+    'tic_tac_toe': {
+        'minimax': lambda game, time_limit: tic_tac_toe_move(game),
+        'mcts': lambda game, time_limit: mcts(game, iterations=None, time_limit=time_limit),
+    },
+    'connect_four': {
+        'alphabeta': lambda game, time_limit: connect_four_move(
+            game, depth=10, time_limit=time_limit, book=_connect_four_book(), endgame_cells=14),
+        'mcts': lambda game, time_limit: mcts(game, iterations=None, time_limit=time_limit),
+    },
+    'quarto': {
+        'mcts': lambda game, time_limit: quarto_mcts(game, QUARTO_ITERATIONS, time_limit),
+        'solver': lambda game, time_limit: best_move_alphabeta(game, depth=1),
+    },
+}
+
+
+def ai_move(game_name, engine, game, time_limit):
+    return ENGINES[game_name][engine](game, time_limit)
+
+
+def fallback_move(game_name, game):
+    '''Jogada de reserva, usada quando a busca não termina no prazo.'''
+    if game_name == 'quarto':
+        return ranked_moves(game)[0]
+    if game_name == 'connect_four':
+        return order_moves(game, game.available_moves())[0]
+    return random.choice(game.available_moves())
+
+
+def encode_move(move):
+    return list(move) if isinstance(move, tuple) else move
+
+
+class Session:
+    def __init__(self, session_id, game_name, engine, human):
+        self.id = session_id
+        self.game_name = game_name
+        self.engine = engine
+        self.human = human
+        new_game, self.decode, self.encode_state, self.is_legal = GAMES[game_name]
+        self.game = new_game()
+        # Serializa as requisições da sessão (uma jogada por vez)
+        self.lock = asyncio.Lock()
+
+    def state(self):
+        state = self.encode_state(self.game)
+        state['over'] = bool(self.game.game_over())
+        state['winner'] = self.game.winner()
+        return state
+
+
+class ServerMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.ai_moves = 0
+        self.timeouts = 0
+        # Buscas que terminaram com exceção (no processo ou no pool); a IA usa a jogada de reserva
+        self.errors = 0
+        self.queued = 0
+        self.in_flight = 0
+        # Latência total de cada jogada da IA (fila + busca) e só da espera na fila, em segundos
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.queue_waits = deque(maxlen=LATENCY_WINDOW)
+
+    @staticmethod
+    def percentiles(values):
+        if not values:
+            return {'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+        ordered = sorted(values)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return {'p50': 1000 * pick(0.5), 'p95': 1000 * pick(0.95), 'max': 1000 * ordered[-1]}
+
+    def as_dict(self, sessions):
+        return {
+            'uptime': time.perf_counter() - self.started,
+            'sessions': sessions,
+            'requests': self.requests,
+            'ai_moves': self.ai_moves,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'queue_depth': self.queued,
+            'in_flight': self.in_flight,
+            'latency_ms': self.percentiles(self.latencies),
+            'queue_wait_ms': self.percentiles(self.queue_waits),
+        }
+
+
+class RequestError(Exception):
+    pass
+
+
+class GameServer:
+    def __init__(self, workers=1, max_pending=None, deadline=2.0):
+        self.pool = get_pool(workers)
+        # Limita as buscas submetidas ao pool; as outras esperam aqui, contadas em queue_depth
+        self.slots = asyncio.Semaphore(max_pending or workers)
+        self.deadline = deadline
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.metrics = ServerMetrics()
+
+    async def compute_move(self, session):
+        '''Jogada da IA na sessão, respeitando o prazo (senão, a jogada de reserva).'''
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + self.deadline
+        game = session.game
+        move = None
+        failed = False
+
+        self.metrics.queued += 1
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.deadline)
+            acquired = True
+        except asyncio.TimeoutError:
+            acquired = False
+        finally:
+            self.metrics.queued -= 1
+
+        if acquired:
+            self.metrics.queue_waits.append(loop.time() - start)
+            budget = deadline - loop.time()
+            self.metrics.in_flight += 1
+            try:
+                future = self.pool.submit(ai_move, session.game_name, session.engine, game.copy(),
+                                          max(budget * SEARCH_FRACTION, 0.01))
+            except Exception:
+                # Pool quebrado (processo morto): não há busca para liberar a vaga depois
+                self.finish_search()
+                self.metrics.errors += 1
+                failed = True
+            else:
+                def release(_):
+                    # A vaga só é liberada quando o processo termina, mesmo após o prazo
+                    loop.call_soon_threadsafe(self.finish_search)
+                future.add_done_callback(release)
+                try:
+                    move = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), max(budget, 0))
+                except asyncio.TimeoutError:
+                    pass
+                except Exception:
+                    # A jogada do humano já foi feita: a IA precisa responder de qualquer jeito
+                    self.metrics.errors += 1
+                    failed = True
+
+        if move is None:
+            if not failed:
+                self.metrics.timeouts += 1
+            move = fallback_move(session.game_name, game)
+        self.metrics.ai_moves += 1
+        self.metrics.latencies.append(loop.time() - start)
+        return move
+
+    def finish_search(self):
+        self.metrics.in_flight -= 1
+        self.slots.release()
+
+    async def play_ai(self, session):
+        game = session.game
+        if game.game_over() or game.current == session.human:
+            return None
+        move = await self.compute_move(session)
+        game.make_move(move)
+        return encode_move(move)
+
+    def session(self, request):
+        session_id = request.get('session')
+        session = self.sessions.get(session_id) if is_int(session_id) else None
+        if session is None:
+            raise RequestError("Sessão inexistente.")
+        return session
+
+    async def new_session(self, request):
+        game_name = request.get('game')
+        if game_name not in GAMES:
+            raise RequestError(f"Jogo desconhecido: {game_name}")
+        engines = ENGINES[game_name]
+        engine = request.get('engine') or next(iter(engines))
+        if engine not in engines:
+            raise RequestError(f"Motor desconhecido para {game_name}: {engine}")
+        human = request.get('human', 0 if game_name == 'quarto' else 'X')
+        if human not in ((0, 1) if game_name == 'quarto' else ('X', 'O')):
+            raise RequestError(f"Lado inválido: {human}")
+
+        session = Session(next(self.ids), game_name, engine, human)
+        self.sessions[session.id] = session
+        async with session.lock:
+            ai = await self.play_ai(session)
+            return {'session': session.id, 'ai_move': ai, 'state': session.state()}
+
+    async def move(self, request):
+        session = self.session(request)
+        async with session.lock:
+            game = session.game
+            if game.game_over():
+                raise RequestError("A partida já terminou.")
+            if game.current != session.human:
+                raise RequestError("Não é a vez do humano.")
+            try:
+                move = session.decode(request['move'])
+                legal = session.is_legal(game, move)
+            except (KeyError, TypeError, ValueError):
+                legal = False
+            if not legal:
+                raise RequestError("Jogada inválida.")
+            game.make_move(move)
+            ai = await self.play_ai(session)
+            return {'ai_move': ai, 'state': session.state()}
+
+    async def handle(self, request):
+        self.metrics.requests += 1
+        op = request.get('op')
+        if op == 'new':
+            return await self.new_session(request)
+        if op == 'move':
+            return await self.move(request)
+        if op == 'state':
+            return {'state': self.session(request).state()}
+        if op == 'close':
+            del self.sessions[self.session(request).id]
+            return {}
+        if op == 'metrics':
+            return {'metrics': self.metrics.as_dict(len(self.sessions))}
+        raise RequestError(f"Operação desconhecida: {op}")
+
+    async def respond(self, line, writer):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request, response = {}, {'ok': False, 'error': "JSON inválido."}
+        else:
+            if not isinstance(request, dict):
+                request, response = {}, {'ok': False, 'error': "A requisição deve ser um objeto JSON."}
+            else:
+                try:
+                    response = {'ok': True, **await self.handle(request)}
+                except RequestError as e:
+                    response = {'ok': False, 'error': str(e)}
+                except Exception as e:
+                    # Nenhuma requisição fica sem resposta, mesmo com um erro inesperado
+                    response = {'ok': False, 'error': f"Erro interno: {type(e).__name__}: {e}"}
+        if 'id' in request:
+            response['id'] = request['id']
+        if not writer.is_closing():
+            writer.write((json.dumps(response) + '\n').encode())
+
+    async def serve_client(self, reader, writer):
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                # Cada requisição é uma tarefa: uma busca lenta não segura as demais da conexão
+                task = asyncio.create_task(self.respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.serve_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de partidas humano vs IA")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help="buscas submetidas ao pool ao mesmo tempo (padrão: --workers)")
+    parser.add_argument('--deadline', type=float, default=2.0, help="prazo (s) de cada jogada da IA")
+    args = parser.parse_args()
+
+    async def main():
+        server = GameServer(args.workers, args.max_pending, args.deadline)
+        print(f"Servindo em {args.host}:{args.port}")
+        await server.serve(args.host, args.port)
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -1,5 +1,13 @@
+import itertools
 import math
 import random
+import time
+
+from process_pool import get_pool
+
+# RAVE equivalence parameter: the AMAF value gets weight beta = sqrt(RAVE_K / (3 * visits + RAVE_K)),
+# i.e. half the weight after RAVE_K visits to the move, and fades as the move's own statistics grow
+RAVE_K = 300
 
 class MCTSNode:
     '''
@@ -13,27 +21,43 @@ class MCTSNode:
         '''
             Initialize the MCTSNode with the current game state, parent node, and move that led to this state.
             Also initializes the list of untried moves from this state.
+            The node does not keep a reference to the game: the search plays and undoes moves
+            on a single game object, so only the player to move is recorded.
         '''
-        self.game = game
+        self.current = game.current
         self.parent = parent
         self.move = move
         self.children = []
         self.visits = 0
         self.wins = 0
-        self.untried_moves = game.available_moves()
+        self.untried_moves = [] if game.game_over() else game.available_moves()
+        # AMAF (all-moves-as-first) statistics of the player to move here, used by RAVE:
+        # move -> [visits, wins] over every simulation through this node in which that
+        # player played the move at any later point, in the tree or in the playout.
+        # Moves are identified by game.amaf_key (the cell taken, in Connect Four)
+        self.amaf = {}
+        self.amaf_key = None
 
-    def ucb1(self, c=math.sqrt(2)):
+    def ucb1(self, c=math.sqrt(2), rave=False):
         '''
             Upper Confidence Bound for Trees (UCB1) algorithm.
             This function calculates the UCB1 value for the node, which is used to balance exploration and exploitation.
             The formula is: UCB1 = (wins / visits) + c * sqrt(log(parent_visits) / visits)
             where c is a constant that determines the level of exploration.
+            With rave=True the mean is blended with the parent's AMAF value of this move:
+            (1 - beta) * wins / visits + beta * amaf_wins / amaf_visits, with beta given by RAVE_K.
         '''
         if self.visits == 0:
             return float('inf')
-        return self.wins / self.visits + c * math.sqrt(math.log(self.parent.visits) / self.visits)
+        value = self.wins / self.visits
+        if rave:
+            amaf = self.parent.amaf.get(self.amaf_key)
+            if amaf:
+                beta = math.sqrt(RAVE_K / (3 * self.visits + RAVE_K))
+                value = (1 - beta) * value + beta * amaf[1] / amaf[0]
+        return value + c * math.sqrt(math.log(self.parent.visits) / self.visits)
 
-    def select_child(self):
+    def select_child(self, rave=False):
         '''
             Select the child node with the highest UCB1 value.
             This function is used during the selection phase of MCTS to choose which child node to explore next.
@@ -45,12 +69,13 @@ class MCTSNode:
         if self.untried_moves:
             return self.children[0]
         # Otherwise, we select the child with the highest UCB1 value
-        return max(self.children, key=lambda child: child.ucb1())
+        return max(self.children, key=lambda child: child.ucb1(rave=rave))
 
-    def expand(self):
+    def expand(self, game):
         '''
             Expand the node by creating a new child node for one of the untried moves.
             This function is used during the expansion phase of MCTS to add a new node to the tree.
+            The move is played on `game` (which must be in this node's state) and left applied.
         '''
         # If there are no untried moves, we cannot expand
         if not self.untried_moves:
@@ -60,9 +85,10 @@ class MCTSNode:
         # to select the move (e.g., based on heuristics or other criteria)
         move = self.untried_moves.pop()
 
-        new_game = self.game.copy()
-        new_game.make_move(move)
-        child = MCTSNode(new_game, parent=self, move=move)
+        key = game.amaf_key(move)
+        game.make_move(move)
+        child = MCTSNode(game, parent=self, move=move)
+        child.amaf_key = key
         self.children.append(child)
         return child
 
@@ -77,41 +103,309 @@ class MCTSNode:
         self.visits += 1
         self.wins += result
 
-def mcts(game, iterations=200):
-    root = MCTSNode(game)
+    def update_amaf(self, moves, result):
+        '''
+            Add the result of a simulation (from the point of view of the player to move here)
+            to the AMAF statistics of each move in `moves`.
+        '''
+        amaf = self.amaf
+        for move in moves:
+            entry = amaf.get(move)
+            if entry is None:
+                amaf[move] = [1, result]
+            else:
+                entry[0] += 1
+                entry[1] += result
+
+class MCTSStats:
+    '''
+        Telemetry of one MCTS search: number of iterations and playouts (more than one per
+        iteration with batch rollouts), wall-clock time and how it was split
+        between the four phases, size of the tree and the deepest node reached.
+    '''
+    def __init__(self):
+        self.iterations = 0
+        self.playouts = 0
+        self.elapsed = 0.0
+        self.selection_time = 0.0
+        self.expansion_time = 0.0
+        self.rollout_time = 0.0
+        self.backprop_time = 0.0
+        self.tree_size = 0
+        self.max_depth = 0
+        self.stopped_early = False
+
+    def playouts_per_second(self):
+        return self.playouts / self.elapsed if self.elapsed else 0.0
+
+    def merge(self, other):
+        '''
+            Accumulate the stats of another tree searched concurrently (root-parallel MCTS).
+        '''
+        self.iterations += other.iterations
+        self.playouts += other.playouts
+        self.elapsed = max(self.elapsed, other.elapsed)
+        self.selection_time += other.selection_time
+        self.expansion_time += other.expansion_time
+        self.rollout_time += other.rollout_time
+        self.backprop_time += other.backprop_time
+        self.tree_size += other.tree_size
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.stopped_early = self.stopped_early or other.stopped_early
 
-    for _ in range(iterations):
+    def as_dict(self):
+        return {
+            'iterations': self.iterations,
+            'playouts': self.playouts,
+            'elapsed': self.elapsed,
+            'playouts_per_second': self.playouts_per_second(),
+            'tree_size': self.tree_size,
+            'max_depth': self.max_depth,
+            'selection_time': self.selection_time,
+            'expansion_time': self.expansion_time,
+            'rollout_time': self.rollout_time,
+            'backprop_time': self.backprop_time,
+            'stopped_early': self.stopped_early,
+        }
+
+    def __repr__(self):
+        return f"MCTSStats({self.as_dict()})"
+
+def tree_size(root):
+    size, stack = 0, [root]
+    while stack:
+        node = stack.pop()
+        size += 1
+        stack.extend(node.children)
+    return size
+
+def decided(root, remaining):
+    '''
+        True when the most visited root child can no longer be overtaken by the runner-up,
+        even if all `remaining` iterations went to the runner-up.
+    '''
+    if len(root.children) < 2:
+        return bool(root.children) and not root.untried_moves
+    first, second = sorted((c.visits for c in root.children), reverse=True)[:2]
+    return first - second > remaining
+
+def search(game, iterations=200, time_limit=None, root=None, early_stop=False, stats=None, rollout_fn=None,
+           rave=False):
+    '''
+        Run MCTS from `game` for at most `iterations` iterations (and at most `time_limit`
+        seconds, if given) and return the root node of the resulting tree.
+        An existing `root` for the same state may be passed to keep growing its tree.
+        With iterations=None the search is bounded by time_limit only (anytime mode).
+        With early_stop=True the search also ends as soon as the best root move is decided,
+        i.e. its visit lead exceeds the iterations that are still expected to run.
+        If an MCTSStats object is given as `stats`, it is filled with the search telemetry.
+        A `rollout_fn` (e.g. connect_four_rollout.BatchRollout) replaces the single random
+        playout: it is called with the leaf position and returns a value in [-1, 1] from X's
+        point of view, typically averaged over many playouts.
+        With rave=True, every simulation also updates the AMAF statistics of all the moves it
+        contained (see MCTSNode.amaf), and selection blends them into UCB1. Batch rollouts do
+        not report their moves, so with a rollout_fn only the tree moves count for AMAF.
+    '''
+    if iterations is None and time_limit is None:
+        raise ValueError("iterations or time_limit must be given")
+    if root is None:
+        root = MCTSNode(game)
+    # A single working copy is searched in place and rewound after every iteration
+    game_sim = game.copy()
+    root_moves = len(game_sim.history)
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    selection = expansion = rollout = backprop = 0.0
+    max_depth = 0
+    done = 0
+    stopped_early = False
+
+    for done in itertools.count() if iterations is None else range(iterations):
+        t0 = clock()
+        if deadline is not None and t0 >= deadline:
+            break
+        if early_stop and done and done % 64 == 0:
+            remaining = float('inf') if iterations is None else iterations - done
+            if deadline is not None:
+                remaining = min(remaining, (deadline - t0) * done / (t0 - start))
+            if decided(root, remaining):
+                stopped_early = True
+                break
         node = root
-        game_sim = game.copy()
+        depth = 0
 
         # Selection
         while node.untried_moves == [] and node.children:
-            node = node.select_child()
+            node = node.select_child(rave)
             game_sim.make_move(node.move)
+            depth += 1
+        t1 = clock()
 
         # Expansion
         if node.untried_moves:
-            node = node.expand()
-            game_sim = node.game.copy()
+            node = node.expand(game_sim)
+            depth += 1
+        max_depth = max(max_depth, depth)
+        t2 = clock()
 
         # Simulation
-        while not game_sim.game_over():
-            move = random.choice(game_sim.available_moves())
-            game_sim.make_move(move)
-
-        # Backpropagation
-        winner = game_sim.winner()
-        if winner == 'X':
-            result = 1
-        elif winner == 'O':
-            result = -1
+        # Moves played after each tree node, by player, for the AMAF updates
+        played = {'X': set(), 'O': set()} if rave else None
+        if rollout_fn is not None and not game_sim.game_over():
+            # Averaged result of a batch of playouts, from X's point of view
+            result = rollout_fn(game_sim)
         else:
-            result = 0
+            while not game_sim.game_over():
+                move = random.choice(game_sim.available_moves())
+                if rave:
+                    played[game_sim.current].add(game_sim.amaf_key(move))
+                game_sim.make_move(move)
+            winner = game_sim.winner()
+            if winner == 'X':
+                result = 1
+            elif winner == 'O':
+                result = -1
+            else:
+                result = 0
+        t3 = clock()
 
+        # Backpropagation
         while node is not None:
-            perspective = 1 if node.game.current == 'O' else -1
+            perspective = 1 if node.current == 'O' else -1
             node.update(perspective * result)
+            if rave:
+                node.update_amaf(played[node.current], -perspective * result)
+                if node.parent is not None:
+                    played[node.parent.current].add(node.amaf_key)
             node = node.parent
 
-    best_child = max(root.children, key=lambda c: c.visits)
-    return best_child.move
+        game_sim.undo_to(root_moves)
+        t4 = clock()
+        selection += t1 - t0
+        expansion += t2 - t1
+        rollout += t3 - t2
+        backprop += t4 - t3
+    else:
+        done = iterations
+
+    if stats is not None:
+        stats.iterations = done
+        stats.playouts = done * getattr(rollout_fn, 'batch_size', 1)
+        stats.elapsed = clock() - start
+        stats.selection_time = selection
+        stats.expansion_time = expansion
+        stats.rollout_time = rollout
+        stats.backprop_time = backprop
+        stats.tree_size = tree_size(root)
+        stats.max_depth = max_depth
+        stats.stopped_early = stopped_early
+    return root
+
+def root_visits(game, iterations, time_limit, seed, early_stop=False, rollout_fn=None, rave=False):
+    '''
+        Worker entry point for root-parallel MCTS: search one independent tree with its own
+        random seed and return the visit count of each root move, plus the search stats.
+    '''
+    random.seed(seed)
+    stats = MCTSStats()
+    root = search(game, iterations, time_limit, early_stop=early_stop, stats=stats, rollout_fn=rollout_fn, rave=rave)
+    return {child.move: child.visits for child in root.children}, stats
+
+def mcts(game, iterations=200, time_limit=None, workers=1, early_stop=False, return_stats=False, rollout_fn=None,
+         rave=False):
+    '''
+        Choose a move with MCTS.
+        With workers > 1, runs root-parallel MCTS: `workers` independent trees (each with up to
+        `iterations` iterations and `time_limit` seconds) are searched in a process pool with
+        different seeds, and the move with the most visits summed over all trees is chosen.
+        Pass iterations=None to search until `time_limit` expires (anytime mode), and
+        early_stop=True to return as soon as the best move can no longer change.
+        With return_stats=True, returns (move, MCTSStats) instead of just the move.
+        `rollout_fn` (batch rollouts) and `rave` (RAVE/AMAF selection) are passed on to search().
+    '''
+    stats = MCTSStats()
+    if workers > 1:
+        pool = get_pool(workers)
+        futures = [pool.submit(root_visits, game, iterations, time_limit, random.getrandbits(64), early_stop, rollout_fn,
+                               rave)
+                   for _ in range(workers)]
+        totals = {}
+        for future in futures:
+            visits_by_move, worker_stats = future.result()
+            stats.merge(worker_stats)
+            for move, visits in visits_by_move.items():
+                totals[move] = totals.get(move, 0) + visits
+        move = max(totals, key=totals.get)
+    else:
+        root = search(game, iterations, time_limit, early_stop=early_stop, stats=stats, rollout_fn=rollout_fn,
+                      rave=rave)
+        move = max(root.children, key=lambda c: c.visits).move
+
+    return (move, stats) if return_stats else move
+
+
+class MCTSSearcher:
+    '''
+        Persistent MCTS player that keeps its tree between consecutive moves.
+        Each call to search() first descends from the previous root along the moves played
+        since then (our move and the opponent's reply, read from game.history) and continues
+        from the matching node, so the statistics gathered on earlier turns are reused.
+        If that node was never expanded (or the game does not follow the old root), a fresh
+        tree is started.
+        ponder() grows the tree while the opponent is thinking; the next search() then only
+        tops the new root up to `iterations` visits.
+    '''
+    def __init__(self, iterations=200, time_limit=None, early_stop=False, rollout_fn=None, rave=False):
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.early_stop = early_stop
+        self.rollout_fn = rollout_fn
+        self.rave = rave
+        self.root = None
+        self.root_history = []
+        self.stats = MCTSStats()
+        self.pondered = False
+
+    def advance(self, game):
+        '''
+            Move the root to the node corresponding to the current state of `game`.
+        '''
+        node = None
+        n = len(self.root_history)
+        if self.root is not None and game.history[:n] == self.root_history:
+            node = self.root
+            for move in game.history[n:]:
+                node = next((child for child in node.children if child.move == move), None)
+                if node is None:
+                    break
+        if node is None:
+            node = MCTSNode(game)
+        # Detach the new root so the discarded part of the tree can be freed
+        node.parent = None
+        self.root = node
+        self.root_history = list(game.history)
+
+    def ponder(self, game, stop, chunk=0.05):
+        '''
+            Search from `game` (the opponent to move) in slices of `chunk` seconds until the
+            `stop` event is set. Meant to run in a background thread (see pondering.Ponderer)
+            while the opponent thinks; the subtree of the move actually played is kept by advance().
+        '''
+        self.advance(game)
+        while not stop.is_set():
+            search(game, None, chunk, root=self.root, rollout_fn=self.rollout_fn, rave=self.rave)
+        self.pondered = True
+
+    def search(self, game):
+        self.advance(game)
+        self.stats = MCTSStats()
+        iterations = self.iterations
+        if self.pondered and iterations is not None:
+            # Visits gathered while pondering count towards the budget of this move
+            iterations = max(1, iterations - self.root.visits)
+        self.pondered = False
+        search(game, iterations, self.time_limit, root=self.root, early_stop=self.early_stop, stats=self.stats,
+               rollout_fn=self.rollout_fn, rave=self.rave)
+        best_child = max(self.root.children, key=lambda c: c.visits)
+        return best_child.move
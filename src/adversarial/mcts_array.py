@@ -0,0 +1,152 @@
+import math
+import random
+import time
+
+import numpy as np
+
+'''
+MCTS com a árvore armazenada em arrays NumPy pré-alocados (struct-of-arrays).
+
+Cada nó é um índice nos arrays abaixo; os filhos de um nó ocupam posições
+contíguas [first_child, first_child + n_children), o que permite calcular o
+UCB1 de todos eles com uma única operação vetorizada. Os nós não guardam o
+estado do jogo: a cada iteração as jogadas são refeitas a partir da raiz
+(make_move) e desfeitas no final (undo_to).
+
+As jogadas são guardadas como códigos inteiros (int16); a tabela `moves`
+converte um código de volta na jogada original, então qualquer jogada
+hashable é aceita (colunas, tuplas (linha, coluna), ...).
+
+Assim como mcts.py, os resultados são do ponto de vista de 'X' (+1) / 'O' (-1),
+e cada nó acumula o valor do ponto de vista de quem fez a jogada que leva a ele.
+'''
+
+UNEXPANDED = -1
+
+# Bytes por nó: visits, value_sum, parent, first_child (4 cada), n_children, move (2 cada), mover (1)
+NODE_BYTES = 4 * 4 + 2 * 2 + 1
+
+
+def nodes_for_budget(megabytes):
+    '''Número de nós que cabem em um orçamento de memória dado em megabytes.'''
+    return int(megabytes * 1024 * 1024) // NODE_BYTES
+
+
+class ArrayMCTS:
+    def __init__(self, max_nodes=1 << 20, c=math.sqrt(2)):
+        self.max_nodes = max_nodes
+        self.c = c
+        self.visits = np.zeros(max_nodes, dtype=np.int32)
+        self.value_sum = np.zeros(max_nodes, dtype=np.float32)
+        self.parent = np.full(max_nodes, -1, dtype=np.int32)
+        self.first_child = np.full(max_nodes, UNEXPANDED, dtype=np.int32)
+        self.n_children = np.zeros(max_nodes, dtype=np.int16)
+        self.move = np.zeros(max_nodes, dtype=np.int16)
+        self.mover = np.zeros(max_nodes, dtype=np.int8)
+        self.moves = []
+        self.move_codes = {}
+        self.size = 1
+
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.visits, self.value_sum, self.parent, self.first_child,
+                                      self.n_children, self.move, self.mover))
+
+    def reset(self):
+        self.visits[:self.size] = 0
+        self.value_sum[:self.size] = 0
+        self.first_child[:self.size] = UNEXPANDED
+        self.n_children[:self.size] = 0
+        self.size = 1
+
+    def _code(self, move):
+        code = self.move_codes.get(move)
+        if code is None:
+            code = self.move_codes[move] = len(self.moves)
+            self.moves.append(move)
+        return code
+
+    def expand(self, node, game):
+        '''
+        Cria de uma vez todos os filhos de `node` (cujo estado é `game`).
+        Retorna False se não houver espaço nos arrays; o nó continua sendo folha.
+        '''
+        moves = [] if game.game_over() else game.available_moves()
+        start = self.size
+        if start + len(moves) > self.max_nodes:
+            return False
+        end = start + len(moves)
+        self.parent[start:end] = node
+        self.move[start:end] = [self._code(m) for m in moves]
+        self.mover[start:end] = 1 if game.current == 'X' else -1
+        self.first_child[node] = start
+        self.n_children[node] = len(moves)
+        self.size = end
+        return True
+
+    def select_child(self, node):
+        '''
+        Escolhe o filho de maior UCB1; filhos nunca visitados têm prioridade.
+        '''
+        start = self.first_child[node]
+        end = start + self.n_children[node]
+        visits = self.visits[start:end]
+        unvisited = np.flatnonzero(visits == 0)
+        if len(unvisited):
+            return start + unvisited[0]
+        ucb = self.value_sum[start:end] / visits + self.c * np.sqrt(math.log(self.visits[node]) / visits)
+        return start + int(np.argmax(ucb))
+
+    def search(self, game, iterations=200, time_limit=None):
+        '''
+        Executa até `iterations` iterações (e até `time_limit` segundos) a partir de
+        `game`, que deve ser o estado da raiz. A árvore é reiniciada a cada chamada.
+        '''
+        self.reset()
+        game_sim = game.copy()
+        root_moves = len(game_sim.history)
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+        for _ in range(iterations):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            node = 0
+            path = [0]
+
+            # Seleção: refaz as jogadas a partir da raiz
+            while self.first_child[node] != UNEXPANDED and self.n_children[node] > 0:
+                node = self.select_child(node)
+                game_sim.make_move(self.moves[self.move[node]])
+                path.append(node)
+
+            # Expansão (somente se ainda houver espaço nos arrays)
+            if self.first_child[node] == UNEXPANDED and self.expand(node, game_sim) and self.n_children[node] > 0:
+                node = self.first_child[node]
+                game_sim.make_move(self.moves[self.move[node]])
+                path.append(node)
+
+            # Simulação
+            while not game_sim.game_over():
+                game_sim.make_move(random.choice(game_sim.available_moves()))
+
+            winner = game_sim.winner()
+            result = 1 if winner == 'X' else -1 if winner == 'O' else 0
+
+            # Retropropagação vetorizada ao longo do caminho
+            path = np.array(path)
+            self.visits[path] += 1
+            self.value_sum[path] += result * self.mover[path]
+
+            game_sim.undo_to(root_moves)
+
+    def best_move(self):
+        start = self.first_child[0]
+        if start == UNEXPANDED or self.n_children[0] == 0:
+            return None
+        best = start + int(np.argmax(self.visits[start:start + self.n_children[0]]))
+        return self.moves[self.move[best]]
+
+
+def array_mcts(game, iterations=200, time_limit=None, max_nodes=1 << 20):
+    tree = ArrayMCTS(max_nodes)
+    tree.search(game, iterations, time_limit)
+    return tree.best_move()
@@ -1,4 +1,10 @@
-def minimax(game, maximizing):
+import time
+
+from tic_tac_toe import TicTacToe
+from tic_tac_toe_table import get_table
+from transposition import EXACT, LOWER, UPPER, node_key
+
+def minimax(game, maximizing, tt=None):
     """
     Implementa o algoritmo Minimax para encontrar o valor de utilidade de um estado do jogo.
 
@@ -9,6 +15,7 @@ def minimax(game, maximizing):
     Parâmetros:
         game (TicTacToe): Instância do jogo com o estado atual do tabuleiro.
         maximizing (bool): Indica se o jogador atual está tentando maximizar (True) ou minimizar (False) o valor.
+        tt (TranspositionTable, opcional): Tabela de transposição para reaproveitar posições já resolvidas.
 
     Retorno:
         int: Valor de utilidade do estado atual:
@@ -23,32 +30,46 @@ def minimax(game, maximizing):
     elif game.full():
         return 0
 
+    if tt is not None:
+        cached, _ = tt.probe(game.key, 0)
+        if cached is not None:
+            return cached
+
     if maximizing:
         best = float('-inf')
         for move in game.available_moves():
-            new_game = game.copy()
-            new_game.make_move(move)
-            score = minimax(new_game, False)
+            game.make_move(move)
+            score = minimax(game, False, tt)
+            game.undo_move()
             best = max(best, score)
-        return best
     else:
         best = float('inf')
         for move in game.available_moves():
-            new_game = game.copy()
-            new_game.make_move(move)
-            score = minimax(new_game, True)
+            game.make_move(move)
+            score = minimax(game, True, tt)
+            game.undo_move()
             best = min(best, score)
-        return best
 
-def best_move(game):
+    if tt is not None:
+        tt.store(game.key, 0, best, EXACT)
+    return best
+
+def best_move(game, tt=None, use_table=True):
+    '''
+    Escolhe a melhor jogada por minimax. No Tic-Tac-Toe (use_table=True) os valores
+    vêm da tabela pré-calculada de tic_tac_toe_table, sem percorrer a árvore.
+    '''
+    if use_table and isinstance(game, TicTacToe):
+        return get_table().best_move(game)
+
     player = game.current
     best_val = float('-inf') if player == 'X' else float('inf')
     best_action = None
 
     for move in game.available_moves():
-        new_game = game.copy()
-        new_game.make_move(move)
-        val = minimax(new_game, maximizing=(player == 'O'))
+        game.make_move(move)
+        val = minimax(game, maximizing=(player == 'O'), tt=tt)
+        game.undo_move()
 
         if (player == 'X' and val > best_val) or (player == 'O' and val < best_val):
             best_val = val
@@ -56,6 +77,29 @@ def best_move(game):
 
     return best_action
 
+def evaluate_leaves(game, moves, player, batch_evaluate_fn):
+    '''
+    Gera os filhos de um nó de profundidade 1 e avalia de uma só vez, com
+    batch_evaluate_fn(jogos, player), todos os que não são terminais.
+    Só as folhas a avaliar em lote são copiadas; o nó é restaurado com undo_move.
+
+    :return: Lista com o valor de cada jogada de `moves`, na mesma ordem.
+    '''
+    values, pending = [], []
+    for move in moves:
+        game.make_move(move)
+        winner = game.winner()
+        if winner:
+            values.append(10000 if winner == player else -10000)
+        else:
+            values.append(None)
+            pending.append(game.copy())
+        game.undo_move()
+    if pending:
+        scores = iter(batch_evaluate_fn(pending, player))
+        values = [int(next(scores)) if v is None else v for v in values]
+    return values
+
 # Minimax with Heuristic Evaluation Function
 '''
 Essa função implementa o algoritmo Minimax com uma função de avaliação heurística.
@@ -71,9 +115,11 @@ Quanto maior o valor, melhor o estado para o jogador atual.
 :param maximizing: Indica se o jogador atual está tentando maximizar (True) ou minimizar (False) o valor.
 :param player: O jogador atual ('X' ou 'O').
 :param evaluate_fn: Função de avaliação heurística que avalia o estado do jogo.
+:param tt: Tabela de transposição (opcional) para reaproveitar posições já avaliadas.
+:param batch_evaluate_fn: Avaliação em lote (opcional) usada para pontuar de uma vez todas as folhas de um nó de profundidade 1.
 :return: Valor numérico representando a qualidade do estado do jogo. 
 '''
-def minimax_with_hef(game, depth, maximizing, player, evaluate_fn):
+def minimax_with_hef(game, depth, maximizing, player, evaluate_fn, tt=None, batch_evaluate_fn=None):
     winner = game.winner()
     if winner == player:
         return 10000
@@ -82,19 +128,174 @@ def minimax_with_hef(game, depth, maximizing, player, evaluate_fn):
     elif game.full() or depth == 0:
         return evaluate_fn(game.board, player)
 
-    if maximizing:
+    if tt is not None:
+        key = node_key(game, maximizing)
+        cached, _ = tt.probe(key, depth)
+        if cached is not None:
+            return cached
+
+    if depth == 1 and batch_evaluate_fn is not None:
+        values = evaluate_leaves(game, game.available_moves(), player, batch_evaluate_fn)
+        best = max(values) if maximizing else min(values)
+    elif maximizing:
         best = float('-inf')
         for move in game.available_moves():
-            new_game = game.copy()
-            new_game.make_move(move)
-            val = minimax_with_hef(new_game, depth - 1, False, player, evaluate_fn)
+            game.make_move(move)
+            val = minimax_with_hef(game, depth - 1, False, player, evaluate_fn, tt, batch_evaluate_fn)
+            game.undo_move()
             best = max(best, val)
-        return best
     else:
         best = float('inf')
         for move in game.available_moves():
-            new_game = game.copy()
-            new_game.make_move(move)
-            val = minimax_with_hef(new_game, depth - 1, True, player, evaluate_fn)
+            game.make_move(move)
+            val = minimax_with_hef(game, depth - 1, True, player, evaluate_fn, tt, batch_evaluate_fn)
+            game.undo_move()
             best = min(best, val)
-        return best
+
+    if tt is not None:
+        tt.store(key, depth, best, EXACT)
+    return best
+
+
+# Alpha-beta com aprofundamento iterativo
+class SearchTimeout(Exception):
+    '''
+    Levantada quando o prazo (deadline) da busca se esgota no meio de uma iteração.
+    '''
+    pass
+
+
+def order_moves(game, moves, pv_move=None):
+    '''
+    Ordena as jogadas do centro para as bordas (colunas centrais no Connect Four,
+    casas centrais no Tic-Tac-Toe) e coloca a jogada da variante principal
+    da iteração anterior (pv_move), se houver, em primeiro lugar.
+    '''
+    center_r, center_c = (game.rows - 1) / 2, (game.cols - 1) / 2
+
+    def centrality(move):
+        if isinstance(move, int):
+            return abs(move - center_c)
+        return abs(move[0] - center_r) + abs(move[1] - center_c)
+
+    ordered = sorted(moves, key=centrality)
+    if pv_move is not None and pv_move in ordered:
+        ordered.remove(pv_move)
+        ordered.insert(0, pv_move)
+    return ordered
+
+
+def alphabeta_with_hef(game, depth, alpha, beta, maximizing, player, evaluate_fn, pv=None, deadline=None, tt=None,
+                       batch_evaluate_fn=None):
+    '''
+    Versão de minimax_with_hef com poda alfa-beta e ordenação de jogadas.
+
+    :param alpha: Melhor valor já garantido para o jogador maximizador.
+    :param beta: Melhor valor já garantido para o jogador minimizador.
+    :param pv: Variante principal da iteração anterior (lista de jogadas), usada para ordenar as jogadas.
+    :param deadline: Instante (time.perf_counter) em que a busca deve ser interrompida com SearchTimeout.
+                     Nesse caso o jogo fica com as jogadas em andamento aplicadas (ver game.undo_to).
+    :param tt: Tabela de transposição (opcional); guarda valores exatos e limites inferiores/superiores.
+    :param batch_evaluate_fn: Avaliação em lote (opcional) das folhas dos nós de profundidade 1.
+    :return: Tupla (valor, variante principal encontrada).
+    '''
+    if deadline is not None and time.perf_counter() >= deadline:
+        raise SearchTimeout()
+
+    winner = game.winner()
+    if winner == player:
+        return 10000, []
+    elif winner and winner != player:
+        return -10000, []
+    elif game.full() or depth == 0:
+        return evaluate_fn(game.board, player), []
+
+    tt_move = None
+    if tt is not None:
+        key = node_key(game, maximizing)
+        cached, tt_move = tt.probe(key, depth, alpha, beta)
+        if cached is not None:
+            return cached, [tt_move] if tt_move is not None else []
+    alpha_orig, beta_orig = alpha, beta
+
+    pv_move = pv[0] if pv else tt_move
+    best_line = []
+    if depth == 1 and batch_evaluate_fn is not None:
+        # Todas as folhas são avaliadas, então o valor obtido é exato
+        moves = order_moves(game, game.available_moves(), pv_move)
+        values = evaluate_leaves(game, moves, player, batch_evaluate_fn)
+        best = max(values) if maximizing else min(values)
+        best_line = [moves[values.index(best)]]
+        alpha_orig, beta_orig = float('-inf'), float('inf')
+    elif maximizing:
+        best = float('-inf')
+        for move in order_moves(game, game.available_moves(), pv_move):
+            child_pv = pv[1:] if pv and move == pv[0] else None
+            game.make_move(move)
+            val, line = alphabeta_with_hef(game, depth - 1, alpha, beta, False, player, evaluate_fn, child_pv,
+                                           deadline, tt, batch_evaluate_fn)
+            game.undo_move()
+            if val > best:
+                best, best_line = val, [move] + line
+            alpha = max(alpha, best)
+            if alpha >= beta:
+                break
+    else:
+        best = float('inf')
+        for move in order_moves(game, game.available_moves(), pv_move):
+            child_pv = pv[1:] if pv and move == pv[0] else None
+            game.make_move(move)
+            val, line = alphabeta_with_hef(game, depth - 1, alpha, beta, True, player, evaluate_fn, child_pv,
+                                           deadline, tt, batch_evaluate_fn)
+            game.undo_move()
+            if val < best:
+                best, best_line = val, [move] + line
+            beta = min(beta, best)
+            if alpha >= beta:
+                break
+
+    if tt is not None:
+        flag = UPPER if best <= alpha_orig else LOWER if best >= beta_orig else EXACT
+        tt.store(key, depth, best, flag, best_line[0] if best_line else None)
+    return best, best_line
+
+
+def iterative_deepening(game, evaluate_fn, max_depth, time_limit=None, tt=None, batch_evaluate_fn=None):
+    '''
+    Executa alphabeta_with_hef com profundidades 1, 2, ..., max_depth, reaproveitando
+    a variante principal de cada iteração para ordenar as jogadas da seguinte.
+
+    Se time_limit (em segundos) for informado, a busca é interrompida quando o tempo
+    se esgota e a jogada da última iteração completa é devolvida. A profundidade 1
+    sempre é concluída, de modo que há sempre uma jogada válida para retornar.
+    Com uma tabela de transposição (tt), as iterações seguintes reaproveitam os
+    resultados e as melhores jogadas das anteriores.
+
+    :return: Tupla (melhor jogada, valor, profundidade alcançada).
+    '''
+    player = game.current
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    n_moves = len(game.history)
+    best_move, best_score, reached, pv = None, None, 0, []
+    # Não adianta buscar além do número de casas vazias
+    max_depth = min(max_depth, sum(row.count(' ') for row in game.board))
+
+    for depth in range(1, max_depth + 1):
+        try:
+            score, line = alphabeta_with_hef(
+                game, depth, float('-inf'), float('inf'), True, player, evaluate_fn,
+                pv=pv, deadline=deadline if depth > 1 else None, tt=tt,
+                batch_evaluate_fn=batch_evaluate_fn
+            )
+        except SearchTimeout:
+            # A busca é feita no próprio jogo: desfaz as jogadas da iteração interrompida
+            game.undo_to(n_moves)
+            break
+        if not line:
+            break
+        pv, best_move, best_score, reached = line, line[0], score, depth
+        # Vitória ou derrota forçada: aprofundar não muda a decisão
+        if abs(score) >= 10000:
+            break
+
+    return best_move, best_score, reached
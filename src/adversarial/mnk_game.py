@@ -0,0 +1,251 @@
+import argparse
+import random
+import time
+from functools import lru_cache
+
+from board_game import BoardGame
+from helper_functions import print_board
+from minimax import iterative_deepening
+from transposition import TranspositionTable
+
+'''
+Jogo m,n,k genérico: tabuleiro de m linhas por n colunas, vence quem alinhar k
+peças (ou mais) na horizontal, vertical ou diagonal. Tic-Tac-Toe é o 3,3,3 e o
+Gomoku é o 15,15,5.
+
+Nada é verificado varrendo o tabuleiro. Cada segmento de k casas consecutivas
+(uma "janela") guarda quantas peças de cada jogador contém, e cada casa conhece
+as janelas que passam por ela (no máximo 4k). Uma jogada só atualiza essas
+janelas e, com elas, os contadores de ameaças: threats[p][c] é o número de
+janelas com c peças do jogador p e nenhuma do oponente. A vitória é uma janela
+com k peças (threats[p][k] > 0) e a avaliação heurística é uma soma ponderada
+dos contadores; as duas custam O(k), independente do tamanho do tabuleiro, e
+desfazer a jogada restaura tudo exatamente.
+'''
+
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+@lru_cache(maxsize=None)
+def windows(rows, cols, k):
+    '''
+    :return: Tupla (quantidade de janelas, janelas de cada casa), em que as casas
+             são numeradas por linha (r * cols + c).
+    '''
+    cell_windows = [[] for _ in range(rows * cols)]
+    count = 0
+    for dr, dc in DIRECTIONS:
+        for r in range(rows):
+            for c in range(cols):
+                end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                if not (0 <= end_r < rows and 0 <= end_c < cols):
+                    continue
+                for i in range(k):
+                    cell_windows[(r + dr * i) * cols + c + dc * i].append(count)
+                count += 1
+    return count, tuple(tuple(w) for w in cell_windows)
+
+
+@lru_cache(maxsize=None)
+def neighborhoods(rows, cols, radius):
+    '''Casas a até `radius` casas de distância (em linha, coluna ou diagonal) de cada casa.'''
+    return tuple(
+        tuple(nr * cols + nc
+              for nr in range(max(0, r - radius), min(rows, r + radius + 1))
+              for nc in range(max(0, c - radius), min(cols, c + radius + 1))
+              if (nr, nc) != (r, c))
+        for r in range(rows) for c in range(cols)
+    )
+
+
+class MNKGame(BoardGame):
+    '''
+    :param radius: Se informado, available_moves só devolve as casas vazias a até
+                   `radius` casas de alguma peça (a casa central no tabuleiro vazio),
+                   o que torna viável buscar em tabuleiros grandes. make_move continua
+                   aceitando qualquer casa vazia.
+    '''
+    def __init__(self, rows=15, cols=15, k=5, radius=None):
+        super().__init__(rows, cols)
+        self.k = k
+        self.radius = radius
+        n_windows, self.cell_windows = windows(rows, cols, k)
+        # Peças de 'X' e de 'O' em cada janela
+        self.counts = ([0] * n_windows, [0] * n_windows)
+        self.threats = ([0] * (k + 1), [0] * (k + 1))
+        self.filled = 0
+        if radius is not None:
+            self.neighbors = neighborhoods(rows, cols, radius)
+            # Quantas peças há na vizinhança de cada casa
+            self.near = [0] * (rows * cols)
+
+    def available_moves(self):
+        cols = self.cols
+        if self.radius is None or self.filled == 0:
+            if self.radius is not None:
+                return [(self.rows // 2, cols // 2)]
+            return [(r, c) for r in range(self.rows) for c in range(cols) if self.board[r][c] == ' ']
+        board, near = self.board, self.near
+        return [(cell // cols, cell % cols) for cell in range(self.rows * cols)
+                if near[cell] and board[cell // cols][cell % cols] == ' ']
+
+    def make_move(self, move):
+        r, c = move
+        if not (0 <= r < self.rows and 0 <= c < self.cols) or self.board[r][c] != ' ':
+            return False
+        cell = r * self.cols + c
+        p = 0 if self.current == 'X' else 1
+        own, other = self.counts[p], self.counts[1 - p]
+        own_threats, other_threats = self.threats[p], self.threats[1 - p]
+        for w in self.cell_windows[cell]:
+            n = own[w]
+            if other[w] == 0:
+                if n:
+                    own_threats[n] -= 1
+                own_threats[n + 1] += 1
+            elif n == 0:
+                # A janela era do oponente e deixa de ser ameaça
+                other_threats[other[w]] -= 1
+            own[w] = n + 1
+
+        if self.radius is not None:
+            near = self.near
+            for neighbor in self.neighbors[cell]:
+                near[neighbor] += 1
+        self.board[r][c] = self.current
+        self.key ^= self.zobrist.squares[cell][p]
+        self.filled += 1
+        self.current = 'O' if self.current == 'X' else 'X'
+        self.history.append(move)
+        return True
+
+    def undo_move(self):
+        r, c = self.history.pop()
+        cell = r * self.cols + c
+        self.current = self.board[r][c]
+        p = 0 if self.current == 'X' else 1
+        own, other = self.counts[p], self.counts[1 - p]
+        own_threats, other_threats = self.threats[p], self.threats[1 - p]
+        for w in self.cell_windows[cell]:
+            n = own[w] - 1
+            own[w] = n
+            if other[w] == 0:
+                own_threats[n + 1] -= 1
+                if n:
+                    own_threats[n] += 1
+            elif n == 0:
+                other_threats[other[w]] += 1
+
+        if self.radius is not None:
+            near = self.near
+            for neighbor in self.neighbors[cell]:
+                near[neighbor] -= 1
+        self.board[r][c] = ' '
+        self.key ^= self.zobrist.squares[cell][p]
+        self.filled -= 1
+
+    def winner(self):
+        # A partida para na primeira janela completa, então no máximo um jogador tem uma
+        if self.threats[0][self.k]:
+            return 'X'
+        if self.threats[1][self.k]:
+            return 'O'
+        return None
+
+    def full(self):
+        return self.filled == self.rows * self.cols
+
+    def evaluate(self, board, player):
+        '''
+        Avaliação heurística no formato de evaluate_fn (minimax_with_hef, iterative_deepening):
+        cada janela ainda aberta com c peças de um jogador vale 10 ** (c - 1) para ele.
+        Usa só os contadores de ameaças; `board` é ignorado, então a busca deve ser feita
+        no próprio objeto do jogo (como em iterative_deepening).
+        '''
+        x, o = self.threats
+        score = 0
+        weight = 1
+        for c in range(1, self.k):
+            score += weight * (x[c] - o[c])
+            weight *= 10
+        # Fica abaixo do valor de vitória (10000) usado pelas buscas
+        score = max(-9999, min(9999, score))
+        return score if player == 'X' else -score
+
+    def copy(self):
+        new = object.__new__(self.__class__)
+        new.rows, new.cols, new.k, new.radius = self.rows, self.cols, self.k, self.radius
+        new.zobrist = self.zobrist
+        new.key = self.key
+        new.history = self.history.copy()
+        new.board = [row.copy() for row in self.board]
+        new.current = self.current
+        new.cell_windows = self.cell_windows
+        new.counts = (self.counts[0].copy(), self.counts[1].copy())
+        new.threats = (self.threats[0].copy(), self.threats[1].copy())
+        new.filled = self.filled
+        if self.radius is not None:
+            new.neighbors = self.neighbors
+            new.near = self.near.copy()
+        return new
+
+
+def best_move(game, depth=4, time_limit=None, tt=None):
+    '''Alfa-beta com aprofundamento iterativo usando a avaliação incremental do jogo.'''
+    move, _, _ = iterative_deepening(game, game.evaluate, max_depth=depth, time_limit=time_limit, tt=tt)
+    return move
+
+
+def benchmark(rows, cols, k, seconds=1.0):
+    '''Jogadas por segundo (make_move + winner + evaluate) em partidas aleatórias.'''
+    moves = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        game = MNKGame(rows, cols, k)
+        empty = game.available_moves()
+        random.shuffle(empty)
+        while empty and not game.winner():
+            game.make_move(empty.pop())
+            game.evaluate(game.board, 'X')
+            moves += 1
+    return moves / seconds
+
+
+def play(rows, cols, k, radius=2):
+    game = MNKGame(rows, cols, k, radius)
+    human = input("Escolha seu lado (X ou O): ").strip().upper()
+    assert human in ['X', 'O']
+    tt = TranspositionTable()
+
+    while not game.game_over():
+        print_board(game.board, cols)
+        if game.current == human:
+            try:
+                r, c = map(int, input(f"Sua jogada ({human}), linha e coluna: ").split())
+            except ValueError:
+                print("Entrada inválida.")
+                continue
+            if not game.make_move((r, c)):
+                print("Casa inválida ou ocupada.")
+        else:
+            print("IA pensando...")
+            move = best_move(game, depth=6, time_limit=2.0, tt=tt)
+            print(f"IA joga em {move}")
+            game.make_move(move)
+
+    print_board(game.board, cols)
+    winner = game.winner()
+    print("Empate." if winner is None else "Você venceu!" if winner == human else "A IA venceu.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jogo m,n,k (Gomoku por padrão)")
+    parser.add_argument('--rows', '-m', type=int, default=15)
+    parser.add_argument('--cols', '-n', type=int, default=15)
+    parser.add_argument('-k', type=int, default=5)
+    parser.add_argument('--bench', action='store_true', help="mede as jogadas por segundo em partidas aleatórias")
+    args = parser.parse_args()
+    if args.bench:
+        print(f"{benchmark(args.rows, args.cols, args.k):.0f} jogadas/s")
+    else:
+        play(args.rows, args.cols, args.k)
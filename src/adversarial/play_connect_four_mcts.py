@@ -3,26 +3,33 @@ import time
 from colorama import Fore, Style, init
 init(autoreset=True)
 
-from connect_four import ConnectFour, ROWS, COLS
-from mcts import mcts
+from connect_four import BitboardConnectFour, ROWS, COLS
+from mcts import MCTSSearcher
+from pondering import Ponderer
 from helper_functions import print_board
 
 def play():
     '''
     Main function to play the game
     '''
-    game = ConnectFour()
+    game = BitboardConnectFour()
     human = input("Escolha seu lado (X ou O): ").strip().upper()
     assert human in ['X', 'O']
     ai = 'O' if human == 'X' else 'X'
+    # A árvore é mantida entre as jogadas da IA
+    searcher = MCTSSearcher(iterations=200)
+    # Enquanto o humano pensa, a árvore continua crescendo a partir da posição atual
+    ponderer = Ponderer(searcher.ponder)
 
     while not game.game_over():
         print_board(game.board, COLS)
         if game.current == human:
+            ponderer.start(game)
             while True:
                 try:
                     col = int(input(f"Sua jogada ({human}), escolha coluna (0-{COLS-1}): "))
                     if col in game.available_moves():
+                        ponderer.stop()
                         game.make_move(col)
                         time.sleep(0.5)
                         break
@@ -32,7 +39,7 @@ def play():
                     print("Entrada inválida.")
         else:
             print("IA pensando...")
-            move = mcts(game, iterations=200)
+            move = searcher.search(game)
             print(f"IA joga na coluna {move}")
             game.make_move(move)
             time.sleep(0.5)
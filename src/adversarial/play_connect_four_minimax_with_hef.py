@@ -4,10 +4,16 @@ from colorama import Fore, Style, init
 # Reinitialize colorama after reset
 init(autoreset=True)
 
-from minimax import minimax_with_hef
-from connect_four import ConnectFour, ROWS, COLS
+from minimax import minimax_with_hef, iterative_deepening, alphabeta_with_hef, order_moves
+from connect_four import ConnectFour, BitboardConnectFour, ROWS, COLS
 
 from helper_functions import print_board
+from connect_four_eval import evaluate_connect_four_np, evaluate_games_batch
+from transposition import TranspositionTable
+from connect_four_book import load_book
+from connect_four_solver import ConnectFourSolver
+from process_pool import get_pool
+from pondering import Ponderer
 
 # Heuristic Evaluation Function
 def evaluate_connect_four(board, player):
@@ -56,52 +62,160 @@ def evaluate_connect_four(board, player):
 
 
 
+# Abaixo dessa profundidade, o custo de enviar as subárvores ao pool supera o ganho
+PARALLEL_MIN_DEPTH = 4
+
+_worker_tt = None
+
+def search_root_move(game, move, depth, alpha, player):
+    '''
+    Executado em um processo do pool: valor alfa-beta da jogada `move` da raiz,
+    com a janela (alpha, +inf). Um valor <= alpha é apenas um limite superior.
+    '''
+    # Cada processo mantém a sua tabela de transposição entre as chamadas
+    global _worker_tt
+    if _worker_tt is None:
+        _worker_tt = TranspositionTable()
+    game.make_move(move)
+    value, _ = alphabeta_with_hef(game, depth - 1, alpha, float('inf'), False, player, evaluate_connect_four_np,
+                                  tt=_worker_tt, batch_evaluate_fn=evaluate_games_batch)
+    return value
+
+def parallel_best_move(game, depth, workers, tt=None):
+    '''
+    Busca alfa-beta com divisão da raiz (PV-split): a primeira jogada (a mais central)
+    é buscada no processo principal com janela completa e fornece o limite alfa; as
+    demais jogadas são buscadas em paralelo no pool, já com esse limite.
+    '''
+    player = game.current
+    moves = order_moves(game, game.available_moves())
+    game.make_move(moves[0])
+    alpha, _ = alphabeta_with_hef(game, depth - 1, float('-inf'), float('inf'), False, player,
+                                  evaluate_connect_four_np, tt=tt, batch_evaluate_fn=evaluate_games_batch)
+    game.undo_move()
+
+    pool = get_pool(workers)
+    futures = [pool.submit(search_root_move, game, move, depth, alpha, player) for move in moves[1:]]
+    best_value, move_choice = alpha, moves[0]
+    for move, future in zip(moves[1:], futures):
+        value = future.result()
+        if value > best_value:
+            best_value, move_choice = value, move
+    return move_choice
+
+# Entradas da tabela do solucionador de finais: com até ~16 casas vazias a busca guarda poucos milhares
+ENDGAME_TT_SIZE = 1 << 16
+
+_endgame_solver = None
+
+def endgame_solver():
+    '''
+    Solucionador de finais do processo, criado na primeira chamada. A tabela é mantida entre
+    as jogadas (as chaves identificam a posição exata), e assim não é alocada a cada jogada.
+    '''
+    global _endgame_solver
+    if _endgame_solver is None:
+        _endgame_solver = ConnectFourSolver(TranspositionTable(ENDGAME_TT_SIZE))
+    return _endgame_solver
+
 # AI Move Selector
-def best_move(game, depth=4):
+def best_move(game, depth=4, alphabeta=False, time_limit=None, tt=None, book=None, endgame_cells=None, workers=1):
     '''
     Essa função determina a melhor jogada para a IA em um jogo de Connect Four,
     utilizando o algoritmo Minimax com uma função de avaliação heurística.
     Ela avalia todas as jogadas disponíveis e escolhe a que maximiza a pontuação
     heurística para o jogador atual, considerando a profundidade especificada.
     :param game: Instância do jogo Connect Four
-    :param depth: Profundidade da busca Minimax
+    :param depth: Profundidade da busca Minimax (profundidade máxima no modo alfa-beta)
+    :param alphabeta: Usa poda alfa-beta com aprofundamento iterativo e avaliação vetorizada (NumPy)
+    :param time_limit: Tempo máximo (segundos) por jogada; implica o modo alfa-beta
+    :param tt: Tabela de transposição (opcional), que pode ser mantida entre jogadas
+    :param book: Livro de aberturas (opcional); se a posição estiver nele, a jogada vem do livro
+    :param endgame_cells: Com até essa quantidade de casas vazias, a jogada vem do solucionador exato
+    :param workers: Com workers > 1 (e depth >= PARALLEL_MIN_DEPTH), as jogadas da raiz são buscadas
+                    em paralelo com alfa-beta (ver parallel_best_move); não se aplica com time_limit
     :return: A melhor coluna para jogar
     '''
+    if book is not None:
+        entry = book.probe(game)
+        if entry is not None:
+            return entry[0]
+
+    if endgame_cells is not None and sum(row.count(' ') for row in game.board) <= endgame_cells:
+        move, _ = endgame_solver().best_move(game)
+        return move
+
+    if alphabeta or time_limit is not None:
+        move, _, _ = iterative_deepening(
+            game, evaluate_connect_four_np, max_depth=depth, time_limit=time_limit, tt=tt,
+            batch_evaluate_fn=evaluate_games_batch
+        )
+        return move
+
+    if workers > 1 and depth >= PARALLEL_MIN_DEPTH and len(game.available_moves()) > 1:
+        return parallel_best_move(game, depth, workers, tt)
+
     player = game.current
     best_score = float('-inf')
     move_choice = None
     for move in game.available_moves():
-        new_game = game.copy()
-        new_game.make_move(move)
+        game.make_move(move)
         # score = minimax_with_dls(new_game, depth - 1, False, player)
         score = minimax_with_hef(
-            game=new_game,
+            game=game,
             depth=depth - 1,
             maximizing=False,
             player=player,
-            evaluate_fn=evaluate_connect_four
+            evaluate_fn=evaluate_connect_four,
+            tt=tt
         )
+        game.undo_move()
         if score > best_score:
             best_score = score
             move_choice = move
     return move_choice
 
+def ponder(game, stop, tt, max_depth=10, slice_time=0.1):
+    '''
+    Pondering do minimax: enquanto o humano pensa, busca a posição após cada resposta
+    possível (das colunas centrais para as bordas), com profundidade crescente e em
+    fatias de slice_time segundos, preenchendo a tabela de transposição (tt) que a
+    IA usa na jogada seguinte.
+    '''
+    depth = 2
+    while not stop.is_set() and depth <= max_depth:
+        for reply in order_moves(game, game.available_moves()):
+            if stop.is_set():
+                break
+            game.make_move(reply)
+            if not game.game_over():
+                iterative_deepening(game, evaluate_connect_four_np, max_depth=depth, time_limit=slice_time, tt=tt,
+                                    batch_evaluate_fn=evaluate_games_batch)
+            game.undo_move()
+        depth += 1
+
 # Replace ConnectFour.print_board with updated function
 ConnectFour.print_board = lambda self: print_board(self.board, COLS)
 
 def play():
-    game = ConnectFour()
+    game = BitboardConnectFour()
     human = input("Escolha seu lado (X ou O): ").strip().upper()
     assert human in ['X', 'O']
     ai = 'O' if human == 'X' else 'X'
+    tt = TranspositionTable()
+    # Gerado com: python connect_four_book.py
+    book = load_book()
+    ponderer = Ponderer(lambda g, stop: ponder(g, stop, tt))
 
     while not game.game_over():
         game.print_board()
         if game.current == human:
+            ponderer.start(game)
             while True:
                 try:
                     col = int(input(f"Sua jogada ({human}), escolha coluna (0-{COLS-1}): "))
                     if col in game.available_moves():
+                        ponderer.stop()
                         game.make_move(col)
                         time.sleep(0.5)
                         break
@@ -111,7 +225,7 @@ def play():
                     print("Entrada inválida.")
         else:
             print("IA pensando...")
-            move = best_move(game, depth=4)
+            move = best_move(game, depth=10, time_limit=1.0, tt=tt, book=book, endgame_cells=16)
             print(f"IA joga na coluna {move}")
             game.make_move(move)
             time.sleep(0.8)
@@ -1,7 +1,18 @@
+from transposition import zobrist_keys
+
+
 class BoardGame:
+    # Quantidade de tipos de peça distintos, usada para dimensionar as chaves de Zobrist
+    piece_kinds = 2
+
     def __init__(self, rows, cols):
         self.rows = rows
         self.cols = cols
+        # Chave de Zobrist da posição, atualizada incrementalmente em make_move
+        self.zobrist = zobrist_keys(rows * cols, self.piece_kinds)
+        self.key = 0
+        # Pilha das jogadas feitas, usada por undo_move
+        self.history = []
         self.board = [[' '] * cols for _ in range(rows)]
         self.current = 'X'
 
@@ -11,6 +22,27 @@ class BoardGame:
     def make_move(self, move):
         raise NotImplementedError
 
+    def undo_move(self):
+        '''
+        Desfaz a última jogada registrada em history. Permite que as buscas
+        explorem a árvore sobre um único objeto mutável, sem copiar o jogo a cada nó.
+        '''
+        raise NotImplementedError
+
+    def amaf_key(self, move):
+        '''
+        Identifica a jogada nas estatísticas AMAF do MCTS (RAVE), que somam os resultados
+        de uma jogada feita em qualquer momento da simulação. Por padrão é a própria jogada;
+        jogos em que a jogada não determina a casa (Connect Four) devolvem a casa ocupada.
+        Deve ser chamado antes de make_move(move).
+        '''
+        return move
+
+    def undo_to(self, n_moves):
+        '''Desfaz jogadas até que restem n_moves no histórico.'''
+        while len(self.history) > n_moves:
+            self.undo_move()
+
     def winner(self):
         raise NotImplementedError
 
@@ -24,6 +56,8 @@ class BoardGame:
         new = self.__class__()
         new.board = [row.copy() for row in self.board]
         new.current = self.current
+        new.key = self.key
+        new.history = self.history.copy()
         return new
 
     def print_board(self):
@@ -1,6 +1,8 @@
-from quarto import Quarto
+from quarto_bitboard import BitboardQuarto
 from minimax_quarto import best_move_quarto
-from mcts_quarto import quarto_mcts
+from mcts_quarto import QuartoMCTSSearcher
+from quarto_solver import QuartoSolver, best_move_alphabeta
+from pondering import Ponderer
 from colorama import Fore, init
 import random
 
@@ -47,17 +49,22 @@ def human_move(game):
             print(Fore.RED + "Entrada inválida. Digite números inteiros válidos.")
 
 
-def play_human_vs_ai(ai_function, ai_name="IA"):
-    game = Quarto()
+def play_human_vs_ai(ai_function, ai_name="IA", ponder_fn=None):
+    # ponder_fn (opcional): busca feita em segundo plano enquanto o humano pensa
+    ponderer = Ponderer(ponder_fn) if ponder_fn else None
+    game = BitboardQuarto()
     start_piece = random.choice(game.available_pieces)
-    game.selected_piece = start_piece
-    game.available_pieces.remove(start_piece)
+    game.select_piece(start_piece)
 
     while not game.game_over():
         game.print_board()
 
         if game.current == 0:
+            if ponderer:
+                ponderer.start(game)
             move = human_move(game)
+            if ponderer:
+                ponderer.stop()
         else:
             print(Fore.BLUE + f"{ai_name} pensando...")
             move = ai_function(game)
@@ -76,13 +83,18 @@ def main_menu():
         print(Fore.CYAN + "\n==== MENU QUARTO ====")
         print("1. Humano vs Minimax")
         print("2. Humano vs MCTS")
-        print("3. Sair")
+        print("3. Humano vs Alfa-beta (final exato)")
+        print("4. Sair")
         op = input("Escolha: ")
         if op == "1":
             play_human_vs_ai(lambda g: best_move_quarto(g, depth=2), ai_name="Minimax")
         elif op == "2":
-            play_human_vs_ai(lambda g: quarto_mcts(g, iterations=1000, time_limit=2), ai_name="MCTS")
+            searcher = QuartoMCTSSearcher(iterations=1000, time_limit=2)
+            play_human_vs_ai(searcher.search, ai_name="MCTS", ponder_fn=searcher.ponder)
         elif op == "3":
+            solver = QuartoSolver(depth=2, endgame_squares=9)
+            play_human_vs_ai(lambda g: best_move_alphabeta(g, solver=solver), ai_name="Alfa-beta")
+        elif op == "4":
             print("Saindo...")
             break
         else:
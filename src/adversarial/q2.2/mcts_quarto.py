@@ -1,70 +1,327 @@
 import math, random, time
 
+from process_pool import get_pool
+from quarto_bitboard import completes_line
+from quarto_rollout import RolloutKernel
+from quarto_solver import PIECE_VALUES, game_state, place_piece, threat_mask
+from quarto_symmetry import canonical_form, state_masks, to_actual_move, to_canonical_move
+
+# Progressive widening: um nó com n visitas pode ter até PW_C * n ** PW_ALPHA filhos
+PW_C = 2.0
+PW_ALPHA = 0.5
+# RAVE: o valor AMAF de uma casa pesa beta = sqrt(RAVE_K / (3 * visitas + RAVE_K)) na seleção
+RAVE_K = 300
+
+def ranked_moves(game):
+    '''
+    Jogadas ordenadas por um prior barato: primeiro as que vencem ao colocar a peça,
+    depois as que entregam uma peça sem vitória imediata para o oponente e por último
+    as que entregam uma peça vencedora. A ordem dentro de cada grupo é aleatória.
+    '''
+    occupied, planes, available, selected = game_state(game)
+    pieces = [i for i in range(16) if available >> i & 1] or [None]
+    winning, safe, losing = [], [], []
+    for row, col in game.available_moves():
+        square = row * 4 + col
+        if selected is None:
+            new_occupied, new_planes = occupied, planes
+        else:
+            new_occupied, new_planes = occupied | 1 << square, place_piece(planes, selected, 1 << square)
+            if completes_line(new_occupied, new_planes, square):
+                winning.append((row, col, pieces[0]))
+                continue
+        threats = threat_mask(new_occupied, new_planes)
+        for i in pieces:
+            if i is not None and PIECE_VALUES[i] & threats:
+                losing.append((row, col, i))
+            else:
+                safe.append((row, col, i))
+    for group in (winning, safe, losing):
+        random.shuffle(group)
+    return winning + safe + losing
+
 class Node:
-    def __init__(self, game, parent=None, move=None):
-        self.game = game
+    def __init__(self, game, parent=None, move=None, widening=False):
+        # O nó não guarda o jogo: a busca joga e desfaz as jogadas sobre um único objeto
         self.parent = parent
         self.move = move
         self.children = []
         self.visits = 0
         self.wins = 0
-        self.untried_moves = [(r, c, i) for (r, c) in game.available_moves()
-                              for i, p in enumerate(game.all_pieces)
-                              if p in game.available_pieces and p != game.selected_piece]
+        # wins conta as vitórias de quem fez a jogada que leva a este nó
+        self.mover = 1 - game.current
+        self.widening = widening
+        # Estatísticas AMAF (RAVE) de quem joga neste nó, por casa: (linha, coluna) -> [visitas, vitórias]
+        # em todas as simulações que passaram pelo nó e em que ele colocou uma peça na casa depois
+        self.amaf = {}
+        if game.game_over():
+            self.untried_moves = []
+        elif widening:
+            # Invertida para que pop() devolva primeiro as jogadas com melhor prior
+            self.untried_moves = ranked_moves(game)[::-1]
+        else:
+            # Na última casa não há peça para entregar
+            pieces = game.available_piece_indices() or [None]
+            self.untried_moves = [(r, c, i) for (r, c) in game.available_moves() for i in pieces]
 
-    def ucb1(self, c=1.41):
+    def can_expand(self):
+        if not self.untried_moves:
+            return False
+        return not self.widening or len(self.children) < PW_C * self.visits ** PW_ALPHA
+
+    def ucb1(self, c=1.41, rave=False):
         if self.visits == 0:
             return float('inf')
-        return self.wins / self.visits + c * math.sqrt(math.log(self.parent.visits) / self.visits)
+        value = self.wins / self.visits
+        if rave:
+            # Mistura a média do nó com o valor AMAF da casa jogada, guardado no pai
+            amaf = self.parent.amaf.get(self.move[:2])
+            if amaf:
+                beta = math.sqrt(RAVE_K / (3 * self.visits + RAVE_K))
+                value = (1 - beta) * value + beta * amaf[1] / amaf[0]
+        return value + c * math.sqrt(math.log(self.parent.visits) / self.visits)
 
-    def select(self):
-        return max(self.children, key=lambda child: child.ucb1())
+    def select(self, rave=False):
+        return max(self.children, key=lambda child: child.ucb1(rave=rave))
 
-    def expand(self):
+    def expand(self, game):
         move = self.untried_moves.pop()
-        new_game = self.game.copy()
-        new_game.make_move(move)
-        child = Node(new_game, parent=self, move=move)
+        game.make_move(move)
+        child = Node(game, parent=self, move=move, widening=self.widening)
         self.children.append(child)
         return child
 
-    def update(self, result):
+    def update(self, winner):
         self.visits += 1
-        self.wins += result
+        if winner == self.mover:
+            self.wins += 1
+
+    def update_amaf(self, squares, winner):
+        won = winner == 1 - self.mover
+        amaf = self.amaf
+        for square in squares:
+            entry = amaf.get(square)
+            if entry is None:
+                amaf[square] = [1, int(won)]
+            else:
+                entry[0] += 1
+                entry[1] += won
 
-def quarto_mcts(game, iterations=500, time_limit=None):
-    root = Node(game)
+# Simulações aleatórias sobre um estado compacto, sem alterar o jogo;
+# rollout.rollouts_per_second() mede a vazão acumulada neste processo
+rollout = RolloutKernel()
+
+def search(game, iterations=500, time_limit=None, root=None, widening=True, rave=False):
+    # Com widening=True, o número de filhos de cada nó cresce com as visitas (PW_C, PW_ALPHA)
+    # e os filhos são expandidos na ordem de ranked_moves.
+    # Com rave=True, cada simulação atualiza as estatísticas AMAF de todas as casas em que cada
+    # jogador colocou peças (na árvore e no rollout), e a seleção as mistura ao UCB1 (RAVE_K)
+    if root is None:
+        root = Node(game, widening=widening)
     start_time = time.time()
+    sim_game = game.copy()
+    root_moves = len(sim_game.history)
 
     for _ in range(iterations):
         if time_limit and time.time() - start_time > time_limit:
             break
 
         node = root
-        sim_game = game.copy()
 
-        while node.untried_moves == [] and node.children:
-            node = node.select()
+        while node.children and not node.can_expand():
+            node = node.select(rave)
             sim_game.make_move(node.move)
 
         if node.untried_moves:
-            node = node.expand()
-            sim_game = node.game.copy()
-
-        while not sim_game.game_over():
-            moves = [(r, c, i) for (r, c) in sim_game.available_moves()
-                     for i, p in enumerate(sim_game.all_pieces)
-                     if p in sim_game.available_pieces and p != sim_game.selected_piece]
-            if not moves:
+            node = node.expand(sim_game)
+
+        if not rave:
+            winner = rollout(sim_game)
+            while node is not None:
+                node.update(winner)
+                node = node.parent
+        else:
+            trace = []
+            winner = rollout(sim_game, trace)
+            # Casas ocupadas por cada jogador depois do nó atual (começando pelo rollout)
+            played = (set(), set())
+            for player, square in trace:
+                played[player].add((square >> 2, square & 3))
+            while node is not None:
+                node.update(winner)
+                node.update_amaf(played[1 - node.mover], winner)
+                if node.parent is not None:
+                    played[node.mover].add(node.move[:2])
+                node = node.parent
+
+        sim_game.undo_to(root_moves)
+
+    return root
+
+class DagNode:
+    # Nó compartilhado por todas as posições equivalentes por simetria (ver quarto_symmetry).
+    # As jogadas ficam no referencial canônico. Jogadas simétricas entre si (que levam ao mesmo
+    # nó filho) só são descobertas ao expandir: a primeira vira aresta e as demais são
+    # descartadas (children guarda os filhos já ligados). wins conta as vitórias de quem fez
+    # a jogada que leva a este nó (mover).
+    def __init__(self, game, transform):
+        self.visits = 0
+        self.wins = 0
+        self.mover = 1 - game.current
+        self.edges = []
+        self.children = set()
+        if game.game_over():
+            self.untried_moves = []
+        else:
+            pieces = game.available_piece_indices() or [None]
+            moves = (to_canonical_move((r, c, i), transform) for (r, c) in game.available_moves() for i in pieces)
+            self.untried_moves = list(moves)
+
+    def select(self, c=1.41):
+        log_visits = math.log(self.visits)
+
+        def ucb1(edge):
+            child = edge[1]
+            if child.visits == 0:
+                return float('inf')
+            return child.wins / child.visits + c * math.sqrt(log_visits / child.visits)
+
+        return max(self.edges, key=ucb1)
+
+    def update(self, winner):
+        self.visits += 1
+        if winner == self.mover:
+            self.wins += 1
+
+def search_dag(game, iterations=500, time_limit=None):
+    # MCTS sobre um DAG: posições equivalentes por simetria compartilham o mesmo nó,
+    # indexado pela chave canônica. Como cada nó guarda as jogadas no referencial canônico,
+    # a transformação da posição real é recalculada a cada passo para converter as jogadas.
+    nodes = {}
+
+    def lookup(g):
+        key, transform = canonical_form(*state_masks(g))
+        node = nodes.get(key)
+        if node is None:
+            node = nodes[key] = DagNode(g, transform)
+        return node, transform
+
+    start_time = time.time()
+    sim_game = game.copy()
+    root_moves = len(sim_game.history)
+    root, root_transform = lookup(sim_game)
+
+    for _ in range(iterations):
+        if time_limit and time.time() - start_time > time_limit:
+            break
+
+        node, transform = root, root_transform
+        path = [root]
+
+        while node.untried_moves == [] and node.edges:
+            move, node = node.select()
+            sim_game.make_move(to_actual_move(move, transform))
+            transform = canonical_form(*state_masks(sim_game))[1]
+            path.append(node)
+
+        # Expande a primeira jogada não tentada que leva a um filho novo; as que levam a um
+        # filho já ligado são simétricas a uma aresta existente e não gastam simulação
+        while node.untried_moves:
+            move = node.untried_moves.pop()
+            sim_game.make_move(to_actual_move(move, transform))
+            child, _ = lookup(sim_game)
+            if child not in node.children:
+                node.children.add(child)
+                node.edges.append((move, child))
+                path.append(child)
                 break
-            move = random.choice(moves)
-            sim_game.make_move(move)
+            sim_game.undo_move()
 
-        winner = sim_game.winner()
-        result = 1 if winner == game.current else 0
+        winner = rollout(sim_game)
+        for node in path:
+            node.update(winner)
 
-        while node is not None:
-            node.update(result)
-            node = node.parent
+        sim_game.undo_to(root_moves)
 
+    return root, root_transform
+
+def root_visits(game, iterations, time_limit, seed, symmetric=False, widening=True, rave=False):
+    # Executado em cada processo do MCTS paralelo na raiz
+    random.seed(seed)
+    if symmetric:
+        root, transform = search_dag(game, iterations, time_limit)
+        return {to_actual_move(move, transform): child.visits for move, child in root.edges}
+    root = search(game, iterations, time_limit, widening=widening, rave=rave)
+    return {child.move: child.visits for child in root.children}
+
+def quarto_mcts(game, iterations=500, time_limit=None, workers=1, symmetric=False, widening=True, rave=False):
+    # Com workers > 1, cada processo constrói uma árvore independente (semente própria)
+    # e as visitas dos filhos da raiz são somadas antes de escolher a jogada.
+    # Com symmetric=True, as posições equivalentes por simetria compartilham nós (search_dag),
+    # que não usa widening nem RAVE.
+    if workers > 1:
+        pool = get_pool(workers)
+        futures = [pool.submit(root_visits, game, iterations, time_limit, random.getrandbits(64), symmetric, widening,
+                               rave)
+                   for _ in range(workers)]
+        totals = {}
+        for future in futures:
+            for move, visits in future.result().items():
+                totals[move] = totals.get(move, 0) + visits
+        return max(totals, key=totals.get) if totals else None
+
+    if symmetric:
+        root, transform = search_dag(game, iterations, time_limit)
+        if not root.edges:
+            return None
+        move, _ = max(root.edges, key=lambda edge: edge[1].visits)
+        return to_actual_move(move, transform)
+
+    root = search(game, iterations, time_limit, widening=widening, rave=rave)
     return max(root.children, key=lambda c: c.visits).move if root.children else None
+
+
+class QuartoMCTSSearcher:
+    # Mantém a árvore entre jogadas: a cada busca, desce da raiz anterior pelas jogadas
+    # feitas desde então (a nossa e a resposta do oponente, lidas de game.history) e
+    # continua a partir do nó correspondente, reaproveitando as simulações já feitas.
+    # ponder() faz a árvore crescer enquanto o oponente pensa (ver pondering.Ponderer)
+    def __init__(self, iterations=500, time_limit=None, widening=True, rave=False):
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.widening = widening
+        self.rave = rave
+        self.root = None
+        self.root_history = []
+        self.pondered = False
+
+    def advance(self, game):
+        node = None
+        n = len(self.root_history)
+        if self.root is not None and game.history[:n] == self.root_history:
+            node = self.root
+            for move in game.history[n:]:
+                node = next((child for child in node.children if child.move == move), None)
+                if node is None:
+                    break
+        if node is None:
+            node = Node(game, widening=self.widening)
+        node.parent = None
+        self.root = node
+        self.root_history = list(game.history)
+
+    def ponder(self, game, stop, chunk=64):
+        self.advance(game)
+        while not stop.is_set():
+            search(game, chunk, root=self.root, widening=self.widening, rave=self.rave)
+        self.pondered = True
+
+    def search(self, game):
+        self.advance(game)
+        iterations = self.iterations
+        if self.pondered:
+            # As visitas acumuladas durante o pondering contam para o orçamento desta jogada
+            iterations = max(1, iterations - self.root.visits)
+        self.pondered = False
+        search(game, iterations, self.time_limit, root=self.root, widening=self.widening, rave=self.rave)
+        return max(self.root.children, key=lambda c: c.visits).move if self.root.children else None
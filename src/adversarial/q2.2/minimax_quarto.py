@@ -1,9 +1,19 @@
 import random
 
+from quarto_symmetry import canonical_key
+from transposition import EXACT, MAXIMIZING_KEY, node_key
+
 def evaluate(game, player):
     return len(game.available_moves())
 
-def minimax(game, depth, maximizing, player):
+def tt_key(game, maximizing, symmetric):
+    # Com symmetric=True, posições equivalentes por simetria compartilham a entrada na tabela
+    if not symmetric:
+        return node_key(game, maximizing)
+    key = canonical_key(game)
+    return key ^ MAXIMIZING_KEY if maximizing else key
+
+def minimax(game, depth, maximizing, player, tt=None, symmetric=False):
     winner = game.winner()
     if winner == player:
         return 1000
@@ -12,33 +22,44 @@ def minimax(game, depth, maximizing, player):
     elif depth == 0 or game.game_over():
         return evaluate(game, player)
 
+    if tt is not None:
+        key = tt_key(game, maximizing, symmetric)
+        cached, _ = tt.probe(key, depth)
+        if cached is not None:
+            return cached
+
     if maximizing:
         max_eval = float('-inf')
         for move in get_all_moves(game):
-            new_game = game.copy()
-            new_game.make_move(move)
-            eval = minimax(new_game, depth - 1, False, player)
+            game.make_move(move)
+            eval = minimax(game, depth - 1, False, player, tt, symmetric)
+            game.undo_move()
             max_eval = max(max_eval, eval)
-        return max_eval
+        result = max_eval
     else:
         min_eval = float('inf')
         for move in get_all_moves(game):
-            new_game = game.copy()
-            new_game.make_move(move)
-            eval = minimax(new_game, depth - 1, True, player)
+            game.make_move(move)
+            eval = minimax(game, depth - 1, True, player, tt, symmetric)
+            game.undo_move()
             min_eval = min(min_eval, eval)
-        return min_eval
+        result = min_eval
+
+    if tt is not None:
+        tt.store(key, depth, result, EXACT)
+    return result
 
 def get_all_moves(game):
     moves = []
+    # Na última casa não há peça para entregar: a jogada só coloca a peça recebida
+    pieces = game.available_piece_indices() or [None]
     for pos in game.available_moves():
         row, col = pos
-        for idx, piece in enumerate(game.all_pieces):
-            if piece in game.available_pieces and piece != game.selected_piece:
-                moves.append((row, col, idx))
+        for idx in pieces:
+            moves.append((row, col, idx))
     return moves
 
-def best_move_quarto(game, depth=2):
+def best_move_quarto(game, depth=2, tt=None, symmetric=False):
     player = game.current
     best_score = float('-inf')
     best_move = None
@@ -46,9 +67,9 @@ def best_move_quarto(game, depth=2):
     random.shuffle(moves)  # add aleatoriedade
 
     for move in moves:
-        new_game = game.copy()
-        new_game.make_move(move)
-        score = minimax(new_game, depth - 1, False, player)
+        game.make_move(move)
+        score = minimax(game, depth - 1, False, player, tt, symmetric)
+        game.undo_move()
         if score > best_score:
             best_score = score
             best_move = move
@@ -0,0 +1,28 @@
+import threading
+
+# Pondering: busca em segundo plano enquanto o humano pensa na sua jogada.
+# A função de busca recebe uma cópia do jogo (o humano a jogar) e um
+# threading.Event, e deve retornar pouco depois de o evento ser sinalizado.
+# O que ela acumula (a árvore do MCTS, a tabela de transposição do minimax)
+# é reaproveitado pela IA quando a jogada do humano chega.
+
+
+class Ponderer:
+    def __init__(self, ponder_fn):
+        self.ponder_fn = ponder_fn
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self, game):
+        '''Começa a pensar sobre `game` (é usada uma cópia, o jogo original pode continuar em uso).'''
+        self.stop()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.ponder_fn, args=(game.copy(), self.stop_event), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        '''Interrompe a busca e espera a thread terminar, antes de o jogo ou a árvore serem alterados.'''
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
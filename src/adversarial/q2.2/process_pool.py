@@ -0,0 +1,26 @@
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+
+# Pools persistentes, um por número de processos: criar processos a cada
+# jogada custaria mais do que boa parte das buscas que eles executam.
+_pools = {}
+
+
+def get_pool(workers):
+    '''
+    Devolve um ProcessPoolExecutor com `workers` processos, criado na primeira
+    chamada e reaproveitado nas seguintes.
+    '''
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+    return pool
+
+
+def shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown(cancel_futures=True)
+    _pools.clear()
+
+
+atexit.register(shutdown_pools)
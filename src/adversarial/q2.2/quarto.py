@@ -1,17 +1,42 @@
+from bisect import insort
+
 from board_game import BoardGame
 from colorama import Fore, Style, init
 
 init(autoreset=True)
 
 class Quarto(BoardGame):
+    piece_kinds = 16
+
     def __init__(self):
         super().__init__(4, 4)
         self.all_pieces = [(a, b, c, d) for a in (0, 1) for b in (0, 1) for c in (0, 1) for d in (0, 1)]
         self.available_pieces = self.all_pieces.copy()
+        self._selected_piece = None
         self.selected_piece = None
         self.pieces_on_board = []
+        # Para cada jogada em history: (peça colocada, se ela ainda constava em available_pieces)
+        self._undo_info = []
         self.current = 0  # 0 = humano, 1 = IA
 
+    @staticmethod
+    def piece_index(piece):
+        '''Índice da peça em all_pieces (os atributos formam os bits do índice).'''
+        return piece[0] * 8 + piece[1] * 4 + piece[2] * 2 + piece[3]
+
+    @property
+    def selected_piece(self):
+        return self._selected_piece
+
+    @selected_piece.setter
+    def selected_piece(self, piece):
+        # A peça a ser jogada também faz parte da chave de Zobrist da posição
+        if self._selected_piece is not None:
+            self.key ^= self.zobrist.extra[self.piece_index(self._selected_piece)]
+        if piece is not None:
+            self.key ^= self.zobrist.extra[self.piece_index(piece)]
+        self._selected_piece = piece
+
     def piece_to_str(self, piece):
         if piece == ' ' or piece is None:
             return "    "
@@ -25,13 +50,23 @@ class Quarto(BoardGame):
     def available_moves(self):
         return [(r, c) for r in range(4) for c in range(4) if self.board[r][c] == ' ']
 
+    def available_piece_indices(self):
+        '''Índices (em all_pieces) das peças que ainda podem ser entregues ao oponente.'''
+        return [i for i, p in enumerate(self.all_pieces)
+                if p in self.available_pieces and p != self.selected_piece]
+
+    def select_piece(self, piece):
+        '''Define a peça a ser jogada no início da partida e a retira das disponíveis.'''
+        self.selected_piece = piece
+        self.available_pieces.remove(piece)
+
     def make_move(self, move):
         row, col, next_piece_idx = move
 
         if not (0 <= row < 4) or not (0 <= col < 4):
             raise ValueError("Posição fora do tabuleiro.")
 
-        if (row, col) not in self.available_moves():
+        if self.board[row][col] != ' ':
             raise ValueError("Posição já ocupada.")
 
         if next_piece_idx is not None:
@@ -41,9 +76,14 @@ class Quarto(BoardGame):
                 raise ValueError("Peça já foi utilizada.")
 
         self.board[row][col] = self.selected_piece
+        if self.selected_piece is not None:
+            self.key ^= self.zobrist.squares[row * 4 + col][self.piece_index(self.selected_piece)]
         self.pieces_on_board.append(self.selected_piece)
-        if self.selected_piece in self.available_pieces:
+        was_available = self.selected_piece in self.available_pieces
+        if was_available:
             self.available_pieces.remove(self.selected_piece)
+        self.history.append(move)
+        self._undo_info.append((self.selected_piece, was_available))
 
         if next_piece_idx is not None:
             self.selected_piece = self.all_pieces[next_piece_idx]
@@ -55,6 +95,21 @@ class Quarto(BoardGame):
         self.current = 1 - self.current
         return True
 
+    def undo_move(self):
+        row, col, next_piece_idx = self.history.pop()
+        placed, was_available = self._undo_info.pop()
+        self.current = 1 - self.current
+        # As peças voltam na ordem de all_pieces, mantendo available_pieces ordenada
+        if next_piece_idx is not None:
+            insort(self.available_pieces, self.all_pieces[next_piece_idx])
+        if was_available:
+            insort(self.available_pieces, placed)
+        self.pieces_on_board.pop()
+        if placed is not None:
+            self.key ^= self.zobrist.squares[row * 4 + col][self.piece_index(placed)]
+        self.board[row][col] = ' '
+        self.selected_piece = placed
+
     def winner(self):
         lines = []
 
@@ -80,6 +135,14 @@ class Quarto(BoardGame):
     def game_over(self):
         return self.winner() is not None or (not self.available_moves())
 
+    def copy(self):
+        new = super().copy()
+        new.available_pieces = self.available_pieces.copy()
+        new.pieces_on_board = self.pieces_on_board.copy()
+        new._undo_info = self._undo_info.copy()
+        new._selected_piece = self._selected_piece
+        return new
+
     def print_board(self):
         print(Fore.CYAN + "\n    0       1       2       3")
         for r in range(4):
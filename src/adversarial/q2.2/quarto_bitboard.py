@@ -0,0 +1,183 @@
+from quarto import Quarto
+from transposition import zobrist_keys
+
+# Casa (linha, coluna) -> bit (linha * 4 + coluna) nas máscaras de 16 bits
+def _line_masks():
+    lines = []
+    for i in range(4):
+        lines.append(sum(1 << (i * 4 + j) for j in range(4)))  # linha i
+        lines.append(sum(1 << (j * 4 + i) for j in range(4)))  # coluna i
+    lines.append(sum(1 << (i * 4 + i) for i in range(4)))
+    lines.append(sum(1 << (i * 4 + 3 - i) for i in range(4)))
+    return lines
+
+
+LINE_MASKS = _line_masks()
+# Linhas (máscaras) que passam por cada casa: só elas podem ser completadas por uma jogada nessa casa
+LINES_THROUGH = [[m for m in LINE_MASKS if m >> s & 1] for s in range(16)]
+FULL = 0xFFFF
+
+
+def piece_attributes(idx):
+    '''Atributos (0/1) da peça de índice idx; o atributo k é o bit (3 - k) do índice.'''
+    return [(idx >> (3 - k)) & 1 for k in range(4)]
+
+
+def completes_line(occupied, planes, square):
+    '''
+    Verifica se alguma linha que passa por `square` está cheia e tem um atributo em
+    comum: para cada atributo, a linha está toda no plano (todas com o atributo) ou
+    toda fora dele (nenhuma com o atributo).
+    '''
+    for line in LINES_THROUGH[square]:
+        if occupied & line == line:
+            for plane in planes:
+                common = plane & line
+                if common == 0 or common == line:
+                    return True
+    return False
+
+
+class BitboardQuarto(Quarto):
+    '''
+    Quarto representado por máscaras de bits de 16 bits (uma casa por bit):
+    ocupação, quatro planos de atributos (casas cujas peças têm o atributo k
+    igual a 1) e peças disponíveis (um bit por índice de all_pieces).
+
+    A vitória é detectada em tempo constante a cada jogada, olhando apenas as
+    linhas que passam pela casa jogada. board, available_pieces, selected_piece
+    e pieces_on_board continuam disponíveis (como propriedades) para que a
+    classe substitua Quarto em main.py, minimax_quarto e mcts_quarto.
+    '''
+    def __init__(self):
+        self.rows = self.cols = 4
+        self.zobrist = zobrist_keys(16, self.piece_kinds)
+        self.key = 0
+        self.history = []
+        self.all_pieces = [(a, b, c, d) for a in (0, 1) for b in (0, 1) for c in (0, 1) for d in (0, 1)]
+        self.occupied = 0
+        self.planes = [0, 0, 0, 0]
+        self.available = FULL
+        self.selected = None
+        self.squares = [None] * 16
+        self._winner = None
+        # Para cada jogada em history: (peça colocada, peças disponíveis e vencedor antes da jogada)
+        self._undo_info = []
+        self.current = 0
+
+    @property
+    def board(self):
+        return [[self.all_pieces[i] if i is not None else ' ' for i in self.squares[r * 4:r * 4 + 4]]
+                for r in range(4)]
+
+    @property
+    def available_pieces(self):
+        return [p for i, p in enumerate(self.all_pieces) if self.available >> i & 1]
+
+    @property
+    def pieces_on_board(self):
+        return [None if i is None else self.all_pieces[i] for i, _, _ in self._undo_info]
+
+    @property
+    def selected_piece(self):
+        return None if self.selected is None else self.all_pieces[self.selected]
+
+    @selected_piece.setter
+    def selected_piece(self, piece):
+        idx = None if piece is None else self.piece_index(piece)
+        if self.selected is not None:
+            self.key ^= self.zobrist.extra[self.selected]
+        if idx is not None:
+            self.key ^= self.zobrist.extra[idx]
+        self.selected = idx
+
+    def select_piece(self, piece):
+        self.selected_piece = piece
+        self.available &= ~(1 << self.selected)
+
+    def available_moves(self):
+        return [(s >> 2, s & 3) for s in range(16) if not self.occupied >> s & 1]
+
+    def available_piece_indices(self):
+        return [i for i in range(16) if self.available >> i & 1]
+
+    def make_move(self, move):
+        row, col, next_piece_idx = move
+
+        if not (0 <= row < 4) or not (0 <= col < 4):
+            raise ValueError("Posição fora do tabuleiro.")
+
+        square = row * 4 + col
+        bit = 1 << square
+        if self.occupied & bit:
+            raise ValueError("Posição já ocupada.")
+
+        if next_piece_idx is not None:
+            if not (0 <= next_piece_idx < 16):
+                raise ValueError("Índice da peça inválido.")
+            if not self.available >> next_piece_idx & 1:
+                raise ValueError("Peça já foi utilizada.")
+
+        piece = self.selected
+        self._undo_info.append((piece, self.available, self._winner))
+        if piece is not None:
+            self.occupied |= bit
+            for k in range(4):
+                if piece >> (3 - k) & 1:
+                    self.planes[k] |= bit
+            self.squares[square] = piece
+            self.key ^= self.zobrist.squares[square][piece] ^ self.zobrist.extra[piece]
+            self.available &= ~(1 << piece)
+            if self._winner is None and completes_line(self.occupied, self.planes, square):
+                self._winner = self.current
+
+        if next_piece_idx is not None:
+            self.available &= ~(1 << next_piece_idx)
+            self.key ^= self.zobrist.extra[next_piece_idx]
+        self.selected = next_piece_idx
+
+        self.history.append(move)
+        self.current = 1 - self.current
+        return True
+
+    def undo_move(self):
+        row, col, next_piece_idx = self.history.pop()
+        piece, self.available, self._winner = self._undo_info.pop()
+        square = row * 4 + col
+        if next_piece_idx is not None:
+            self.key ^= self.zobrist.extra[next_piece_idx]
+        if piece is not None:
+            bit = ~(1 << square)
+            self.occupied &= bit
+            for k in range(4):
+                self.planes[k] &= bit
+            self.squares[square] = None
+            self.key ^= self.zobrist.squares[square][piece] ^ self.zobrist.extra[piece]
+        self.selected = piece
+        self.current = 1 - self.current
+
+    def winner(self):
+        return self._winner
+
+    def full(self):
+        return self.occupied == FULL
+
+    def game_over(self):
+        return self._winner is not None or self.occupied == FULL
+
+    def copy(self):
+        new = object.__new__(self.__class__)
+        new.rows = new.cols = 4
+        new.zobrist = self.zobrist
+        new.key = self.key
+        new.history = self.history.copy()
+        new.all_pieces = self.all_pieces
+        new.occupied = self.occupied
+        new.planes = self.planes.copy()
+        new.available = self.available
+        new.selected = self.selected
+        new.squares = self.squares.copy()
+        new._winner = self._winner
+        new._undo_info = self._undo_info.copy()
+        new.current = self.current
+        return new
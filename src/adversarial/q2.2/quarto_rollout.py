@@ -0,0 +1,116 @@
+'''
+Núcleo de simulação (rollout) do MCTS do Quarto.
+
+Joga partidas aleatórias sobre um estado compacto (máscaras de 16 bits de
+ocupação e dos quatro atributos) sem tocar no objeto do jogo: as casas vazias e
+as peças disponíveis ficam em listas pré-alocadas e cada lance sorteia uma
+posição e a remove trocando-a com a última (O(1), sem criar listas por lance).
+A vitória é verificada só nas linhas que passam pela casa jogada.
+'''
+import random
+import time
+
+from quarto_bitboard import FULL, LINES_THROUGH
+from quarto_solver import game_state
+
+
+class RolloutKernel:
+    def __init__(self):
+        self.squares = [0] * 16
+        self.pieces = [0] * 16
+        self.rollouts = 0
+        self.elapsed = 0.0
+
+    def playout(self, occupied, planes, available, selected, current, trace=None):
+        '''
+        Joga aleatoriamente até o fim a partir do estado dado (o jogador `current`
+        coloca `selected`) e retorna o vencedor (0 ou 1) ou None em caso de empate.
+        Se `trace` (lista) for dado, cada colocação é anotada nele como (jogador, casa).
+        '''
+        squares, pieces = self.squares, self.pieces
+        n_squares = n_pieces = 0
+        empty = FULL & ~occupied
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            squares[n_squares] = bit.bit_length() - 1
+            n_squares += 1
+        while available:
+            bit = available & -available
+            available ^= bit
+            pieces[n_pieces] = bit.bit_length() - 1
+            n_pieces += 1
+
+        a, b, c, d = planes
+        rand = random.random
+        if selected is None and n_pieces:
+            # Ninguém escolheu a primeira peça ainda: o lance só entrega uma peça
+            i = int(rand() * n_pieces)
+            selected = pieces[i]
+            n_pieces -= 1
+            pieces[i] = pieces[n_pieces]
+            current = 1 - current
+        while n_squares and selected is not None:
+            i = int(rand() * n_squares)
+            square = squares[i]
+            n_squares -= 1
+            squares[i] = squares[n_squares]
+
+            if trace is not None:
+                trace.append((current, square))
+            bit = 1 << square
+            occupied |= bit
+            if selected & 8:
+                a |= bit
+            if selected & 4:
+                b |= bit
+            if selected & 2:
+                c |= bit
+            if selected & 1:
+                d |= bit
+            for line in LINES_THROUGH[square]:
+                if occupied & line == line:
+                    for plane in (a, b, c, d):
+                        common = plane & line
+                        if common == 0 or common == line:
+                            return current
+
+            if n_pieces:
+                i = int(rand() * n_pieces)
+                selected = pieces[i]
+                n_pieces -= 1
+                pieces[i] = pieces[n_pieces]
+            else:
+                selected = None
+            current = 1 - current
+        return None
+
+    def __call__(self, game, trace=None):
+        '''Vencedor de uma partida aleatória a partir de `game` (que não é alterado).'''
+        start = time.perf_counter()
+        if game.game_over():
+            winner = game.winner()
+        else:
+            winner = self.playout(*game_state(game), game.current, trace)
+        self.rollouts += 1
+        self.elapsed += time.perf_counter() - start
+        return winner
+
+    def rollouts_per_second(self):
+        return self.rollouts / self.elapsed if self.elapsed else 0.0
+
+    def reset_stats(self):
+        self.rollouts = 0
+        self.elapsed = 0.0
+
+
+if __name__ == "__main__":
+    from quarto_bitboard import BitboardQuarto
+
+    game = BitboardQuarto()
+    game.select_piece(game.all_pieces[0])
+    kernel = RolloutKernel()
+    deadline = time.perf_counter() + 1.0
+    while time.perf_counter() < deadline:
+        kernel(game)
+    print(f"{kernel.rollouts_per_second():.0f} rollouts/s")
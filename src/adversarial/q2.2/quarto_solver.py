@@ -0,0 +1,221 @@
+'''
+Motor alfa-beta para o Quarto.
+
+Cada turno (colocar a peça recebida e entregar a próxima ao oponente) é um
+único nó da árvore, com um lance combinado (casa, peça entregue), e não dois
+lances separados do mesmo jogador. Separar os dois lances só serviria para
+podar as entregas que perdem na hora, e as ameaças abaixo já fazem isso sem
+criar o nó intermediário. Os lances são gerados sob demanda (sem montar a
+lista de até 16 x 15 = 240 pares casa x peça) na ordem: jogada da tabela de
+transposição, killer moves da profundidade e depois as demais.
+
+Antes de gerar qualquer lance, o motor calcula as "ameaças" do tabuleiro: os
+valores de atributo que completariam alguma linha com três peças. Com isso,
+colocar a peça recebida numa casa vencedora e entregar uma peça que dá a
+vitória imediata ao oponente são detectados sem descer na árvore.
+
+A tabela de transposição tem tamanho fixo (TranspositionTable), de modo que
+um mesmo QuartoSolver pode ser reaproveitado entre jogadas e partidas sem que
+a memória cresça a cada busca.
+
+Com até `endgame_squares` casas vazias a busca vai até o fim da partida
+(resultado exato: vitória, derrota ou empate); antes disso ela é limitada a
+`depth` turnos e as folhas valem 0.
+'''
+from quarto_bitboard import FULL, LINE_MASKS, completes_line
+from quarto_symmetry import state_masks
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+WIN = 1000
+# Entradas da tabela padrão: um final exato com 9 casas vazias guarda cerca de 20 mil posições
+TT_SIZE = 1 << 16
+
+# Para cada peça, os valores dos atributos codificados como bits (2k + valor do atributo k)
+PIECE_VALUES = [sum(1 << (2 * k + (p >> (3 - k) & 1)) for k in range(4)) for p in range(16)]
+
+
+# Ocupação -> linhas com exatamente uma casa vazia (preenchido sob demanda)
+_NEAR_FULL = {}
+
+
+def near_full_lines(occupied):
+    lines = _NEAR_FULL.get(occupied)
+    if lines is None:
+        lines = _NEAR_FULL[occupied] = tuple(
+            line for line in LINE_MASKS
+            if line & ~occupied and not (line & ~occupied) & ((line & ~occupied) - 1))
+    return lines
+
+
+def threat_mask(occupied, planes):
+    '''
+    Valores de atributo (bits 2k + valor) que completam alguma linha com três
+    peças: uma peça p vence em algum lugar se PIECE_VALUES[p] & threat_mask != 0.
+    '''
+    threats = 0
+    for line in near_full_lines(occupied):
+        filled = line & occupied
+        for k in range(4):
+            common = planes[k] & filled
+            if common == filled:
+                threats |= 1 << (2 * k + 1)
+            elif not common:
+                threats |= 1 << (2 * k)
+    return threats
+
+
+def place_piece(planes, piece, bit):
+    a, b, c, d = planes
+    return (a | bit if piece & 8 else a, b | bit if piece & 4 else b,
+            c | bit if piece & 2 else c, d | bit if piece & 1 else d)
+
+
+def game_state(game):
+    '''Ocupação, planos de atributos, peças disponíveis e peça a jogar de um Quarto ou BitboardQuarto.'''
+    occupied, planes, selected = state_masks(game)
+    available = sum(1 << i for i in game.available_piece_indices())
+    return occupied, tuple(planes), available, selected
+
+
+class QuartoSolver:
+    def __init__(self, depth=2, endgame_squares=9, tt=None):
+        self.depth = depth
+        self.endgame_squares = endgame_squares
+        self.tt = tt if tt is not None else TranspositionTable(TT_SIZE)
+        self.killers = {}
+        self.nodes = 0
+
+    def clear(self):
+        self.tt.clear()
+        self.killers.clear()
+        self.nodes = 0
+
+    def moves(self, occupied, planes, available, selected, first):
+        '''
+        Gera (casa, peça entregue, planos e ameaças após colocar) sob demanda. Se nenhuma
+        peça é segura depois de colocar numa casa, gera só um par com uma peça
+        qualquer: o oponente vence com ela no nó seguinte, sem expandir os demais.
+        '''
+        for square, piece in first:
+            bit = 1 << square
+            if not occupied & bit and available >> piece & 1:
+                new_planes = place_piece(planes, selected, bit)
+                yield square, piece, new_planes, threat_mask(occupied | bit, new_planes)
+
+        empties = FULL & ~occupied
+        while empties:
+            bit = empties & -empties
+            empties ^= bit
+            square = bit.bit_length() - 1
+            new_planes = place_piece(planes, selected, bit)
+            threats = threat_mask(occupied | bit, new_planes)
+            safe, losing = False, None
+            pieces = available
+            while pieces:
+                piece_bit = pieces & -pieces
+                pieces ^= piece_bit
+                piece = piece_bit.bit_length() - 1
+                if (square, piece) in first:
+                    continue
+                if PIECE_VALUES[piece] & threats:
+                    losing = piece
+                    continue
+                safe = True
+                yield square, piece, new_planes, threats
+            if not safe and losing is not None:
+                yield square, losing, new_planes, threats
+
+    def place(self, occupied, planes, available, selected, depth, alpha, beta, threats=None):
+        '''
+        Valor (do ponto de vista de quem joga) da posição em que o jogador deve
+        colocar `selected` e entregar uma das peças de `available`. `threats` é o
+        threat_mask da posição, quando quem chama já o calculou.
+        '''
+        self.nodes += 1
+        if threats is None:
+            threats = threat_mask(occupied, planes)
+        if PIECE_VALUES[selected] & threats:
+            return WIN, None
+        empties = FULL & ~occupied
+        if not empties & (empties - 1):
+            return 0, None  # última casa: o tabuleiro fica cheio sem vitória
+        if depth == 0:
+            return 0, None
+
+        key = occupied | planes[0] << 16 | planes[1] << 32 | planes[2] << 48 | planes[3] << 64 \
+            | available << 80 | selected << 96
+        cached, hash_move = self.tt.probe(key, depth, alpha, beta)
+        if cached is not None:
+            return cached, hash_move
+
+        empty_count = bin(empties).count('1')
+        killers = self.killers.setdefault(empty_count, [])
+        first = [hash_move] if hash_move else []
+        first += [m for m in killers if m != hash_move]
+
+        original_alpha = alpha
+        best, best_move = -WIN - 1, None
+        for square, piece, new_planes, new_threats in self.moves(occupied, planes, available, selected, first):
+            value, _ = self.place(occupied | 1 << square, new_planes, available & ~(1 << piece), piece,
+                                  depth - 1, -beta, -alpha, new_threats)
+            value = -value
+            if value > best:
+                best, best_move = value, (square, piece)
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        if best_move not in killers:
+                            killers.insert(0, best_move)
+                            del killers[2:]
+                        break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, best, flag, best_move)
+        return best, best_move
+
+    def solve(self, game):
+        '''
+        Retorna (jogada, valor, exato). O valor é WIN, -WIN ou 0 do ponto de vista
+        do jogador da vez; `exato` indica se a busca chegou ao fim da partida.
+        '''
+        occupied, planes, available, selected = game_state(game)
+        empties = FULL & ~occupied
+        empty_count = bin(empties).count('1')
+        exact = empty_count <= self.endgame_squares
+        depth = empty_count if exact else self.depth
+
+        if selected is None:
+            # Início da partida sem peça escolhida: o lance é só entregar uma peça
+            square = (empties & -empties).bit_length() - 1
+            best, best_move = -WIN - 1, None
+            for piece in range(16):
+                if available >> piece & 1:
+                    value, _ = self.place(occupied, planes, available & ~(1 << piece), piece,
+                                          depth, -WIN, -best)
+                    if -value > best:
+                        best, best_move = -value, (square, piece)
+            return (best_move[0] >> 2, best_move[0] & 3, best_move[1]), best, exact
+
+        value, move = self.place(occupied, planes, available, selected, depth, -WIN, WIN)
+        if move is None:
+            # Vitória imediata ou última casa: a peça entregue não importa (ou não existe)
+            squares = [s for s in range(16) if empties >> s & 1]
+            if value == WIN:
+                squares = [s for s in squares
+                           if completes_line(occupied | 1 << s, place_piece(planes, selected, 1 << s), s)]
+            square = squares[0]
+            piece = (available & -available).bit_length() - 1 if available else None
+            move = (square, piece)
+        square, piece = move
+        return (square >> 2, square & 3, piece), value, exact
+
+
+def best_move_alphabeta(game, depth=2, endgame_squares=9, solver=None):
+    solver = solver or QuartoSolver(depth, endgame_squares)
+    move, _, _ = solver.solve(game)
+    return move
@@ -0,0 +1,134 @@
+from itertools import permutations
+
+from quarto_bitboard import LINE_MASKS, BitboardQuarto
+
+'''
+Forma canônica de posições do Quarto, para tabelas de transposição e para o
+compartilhamento de nós (DAG) no MCTS.
+
+Duas posições são equivalentes quando uma é obtida da outra por:
+  - uma das 32 simetrias do tabuleiro que preservam o conjunto de linhas
+    (linhas, colunas e as duas diagonais);
+  - uma permutação dos 4 atributos das peças;
+  - o complemento de qualquer subconjunto de atributos.
+
+A posição é descrita por máscaras de 16 bits (ocupação e um plano por
+atributo, como em BitboardQuarto) mais a peça selecionada. Para cada simetria
+do tabuleiro, cada atributo vira um par (plano, bit do atributo na peça
+selecionada); o complemento do atributo troca esse par por
+(plano ^ ocupação, bit ^ 1), e escolhemos o menor dos dois. Ordenar os quatro
+pares fixa a permutação dos atributos. A forma canônica é a menor entre as
+32 simetrias, de modo que posições equivalentes têm a mesma chave.
+'''
+
+
+def _apply(dest, mask):
+    return sum(1 << dest[s] for s in range(16) if mask >> s & 1)
+
+
+def _board_symmetries():
+    # Casa s vai para dest[s]; mantém as permutações (linhas, colunas, transposição)
+    # que levam o conjunto de linhas vencedoras nele mesmo
+    lines = set(LINE_MASKS)
+    symmetries = []
+    for sigma in permutations(range(4)):
+        for tau in permutations(range(4)):
+            for transpose in (False, True):
+                dest = []
+                for r in range(4):
+                    for c in range(4):
+                        nr, nc = (tau[c], sigma[r]) if transpose else (sigma[r], tau[c])
+                        dest.append(nr * 4 + nc)
+                if dest not in symmetries and all(_apply(dest, m) in lines for m in LINE_MASKS):
+                    symmetries.append(dest)
+    return symmetries
+
+
+BOARD_SYMMETRIES = _board_symmetries()
+INVERSE_SYMMETRIES = [[dest.index(s) for s in range(16)] for dest in BOARD_SYMMETRIES]
+# Tabelas por byte: transformar uma máscara custa duas consultas
+BYTE_TABLES = [([_apply(dest, b) for b in range(256)], [_apply(dest, b << 8) for b in range(256)])
+               for dest in BOARD_SYMMETRIES]
+
+
+def state_masks(game):
+    '''(ocupação, planos dos atributos, índice da peça selecionada) de um Quarto qualquer.'''
+    if isinstance(game, BitboardQuarto):
+        return game.occupied, game.planes, game.selected
+    occupied, planes = 0, [0, 0, 0, 0]
+    for r in range(4):
+        for c in range(4):
+            piece = game.board[r][c]
+            if piece != ' ' and piece is not None:
+                occupied |= 1 << (r * 4 + c)
+                for k in range(4):
+                    if piece[k]:
+                        planes[k] |= 1 << (r * 4 + c)
+    selected = None if game.selected_piece is None else game.piece_index(game.selected_piece)
+    return occupied, planes, selected
+
+
+def canonical_form(occupied, planes, selected):
+    '''
+    :return: Tupla (chave, transformação). A chave é um inteiro que identifica a classe
+             de equivalência da posição; a transformação (simetria, ordem dos atributos,
+             complementos) leva a posição à forma canônica e é usada por to_canonical_move
+             e to_actual_move.
+    '''
+    # A ocupação transformada é o primeiro critério de comparação: só as simetrias
+    # que a minimizam precisam ter os planos transformados
+    occs = [lo[occupied & 255] | hi[occupied >> 8] for lo, hi in BYTE_TABLES]
+    occ = min(occs)
+    best = None
+    for t, (lo, hi) in enumerate(BYTE_TABLES):
+        if occs[t] != occ:
+            continue
+        pairs = []
+        for k in range(4):
+            plane = lo[planes[k] & 255] | hi[planes[k] >> 8]
+            bit = 0 if selected is None else selected >> (3 - k) & 1
+            flipped = (plane ^ occ, bit ^ 1 if selected is not None else 0)
+            if flipped < (plane, bit):
+                pairs.append(flipped + (k, 1))
+            else:
+                pairs.append((plane, bit, k, 0))
+        pairs.sort()
+        form = (occ, [(p, b) for p, b, _, _ in pairs])
+        if best is None or form < best[0]:
+            best = (form, t, [k for _, _, k, _ in pairs], [f for _, _, _, f in pairs])
+
+    (occ, pairs), t, order, flips = best
+    key = occ
+    for plane, bit in pairs:
+        key = (key << 17) | (plane << 1) | bit
+    key = (key << 1) | (selected is None)
+    return key, (t, order, flips)
+
+
+def canonical_key(game):
+    return canonical_form(*state_masks(game))[0]
+
+
+def _map_piece(idx, order, flips):
+    # Atributo j da peça transformada = atributo order[j] da original, complementado se flips[j]
+    return sum(((idx >> (3 - order[j]) & 1) ^ flips[j]) << (3 - j) for j in range(4))
+
+
+def _unmap_piece(idx, order, flips):
+    return sum(((idx >> (3 - j) & 1) ^ flips[j]) << (3 - order[j]) for j in range(4))
+
+
+def to_canonical_move(move, transform):
+    '''Converte uma jogada (linha, coluna, peça) do tabuleiro real para o referencial canônico.'''
+    row, col, piece = move
+    t, order, flips = transform
+    square = BOARD_SYMMETRIES[t][row * 4 + col]
+    return square >> 2, square & 3, None if piece is None else _map_piece(piece, order, flips)
+
+
+def to_actual_move(move, transform):
+    '''Inverso de to_canonical_move.'''
+    row, col, piece = move
+    t, order, flips = transform
+    square = INVERSE_SYMMETRIES[t][row * 4 + col]
+    return square >> 2, square & 3, None if piece is None else _unmap_piece(piece, order, flips)
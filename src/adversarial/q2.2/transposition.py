@@ -0,0 +1,119 @@
+import random
+
+# Tipos de valor armazenados na tabela de transposição
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Chave combinada (XOR) com a chave da posição quando o nó é maximizador,
+# para que minimax/alfa-beta não confundam os dois lados da árvore.
+MAXIMIZING_KEY = random.Random(0x5EED).getrandbits(64)
+
+
+class Zobrist:
+    '''
+    Chaves aleatórias de 64 bits para hashing de Zobrist: uma para cada
+    par (casa, tipo de peça) e uma extra por tipo de peça, usada por jogos
+    que têm estado fora do tabuleiro (p.ex. a peça selecionada no Quarto).
+
+    A chave de uma posição é o XOR das chaves das peças presentes, de modo
+    que pode ser atualizada incrementalmente a cada make_move.
+    '''
+    def __init__(self, squares, piece_kinds, seed=2025):
+        rng = random.Random(seed)
+        self.squares = [[rng.getrandbits(64) for _ in range(piece_kinds)] for _ in range(squares)]
+        self.extra = [rng.getrandbits(64) for _ in range(piece_kinds)]
+
+
+_zobrist_cache = {}
+
+def zobrist_keys(squares, piece_kinds):
+    '''
+    Devolve a tabela de Zobrist compartilhada para o formato de tabuleiro dado,
+    para que todas as instâncias de um mesmo jogo gerem as mesmas chaves.
+    '''
+    shape = (squares, piece_kinds)
+    if shape not in _zobrist_cache:
+        _zobrist_cache[shape] = Zobrist(squares, piece_kinds)
+    return _zobrist_cache[shape]
+
+
+def node_key(game, maximizing):
+    return game.key ^ MAXIMIZING_KEY if maximizing else game.key
+
+
+class TranspositionTable:
+    '''
+    Tabela de transposição de tamanho fixo, organizada em buckets de `ways`
+    entradas. Cada entrada guarda (chave, profundidade, valor, tipo, jogada).
+
+    Ao inserir uma posição nova num bucket cheio, a entrada de menor
+    profundidade é substituída (replacement-by-depth); uma posição já
+    presente só é sobrescrita por uma busca de profundidade maior ou igual.
+
+    Os contadores probes/hits/cutoffs/stores permitem medir a taxa de acerto.
+    '''
+    def __init__(self, size=1 << 20, ways=4):
+        self.ways = ways
+        self.n_buckets = max(1, size // ways)
+        size = self.n_buckets * ways
+        self.keys = [None] * size
+        self.depths = [-1] * size
+        self.values = [0] * size
+        self.flags = [EXACT] * size
+        self.moves = [None] * size
+        self.probes = self.hits = self.cutoffs = self.stores = 0
+
+    def _find(self, key):
+        start = (key % self.n_buckets) * self.ways
+        for i in range(start, start + self.ways):
+            if self.keys[i] == key:
+                return i
+        return -1
+
+    def probe(self, key, depth, alpha=float('-inf'), beta=float('inf')):
+        '''
+        Consulta a tabela. Retorna (valor, jogada): valor é diferente de None
+        apenas quando a entrada tem profundidade suficiente e seu tipo permite
+        encerrar a busca do nó (valor exato ou limite fora da janela alfa-beta);
+        jogada é a melhor jogada armazenada, útil para ordenação mesmo sem corte.
+        '''
+        self.probes += 1
+        i = self._find(key)
+        if i < 0:
+            return None, None
+        self.hits += 1
+        if self.depths[i] >= depth:
+            value, flag = self.values[i], self.flags[i]
+            if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                self.cutoffs += 1
+                return value, self.moves[i]
+        return None, self.moves[i]
+
+    def store(self, key, depth, value, flag=EXACT, move=None):
+        i = self._find(key)
+        if i >= 0:
+            if depth < self.depths[i]:
+                return
+        else:
+            start = (key % self.n_buckets) * self.ways
+            i = min(range(start, start + self.ways), key=self.depths.__getitem__)
+        self.stores += 1
+        self.keys[i] = key
+        self.depths[i] = depth
+        self.values[i] = value
+        self.flags[i] = flag
+        self.moves[i] = move
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def stats(self):
+        return {
+            'probes': self.probes,
+            'hits': self.hits,
+            'cutoffs': self.cutoffs,
+            'stores': self.stores,
+            'hit_rate': self.hit_rate(),
+        }
+
+    def clear(self):
+        self.__init__(len(self.keys), self.ways)
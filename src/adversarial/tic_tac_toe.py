@@ -75,10 +75,18 @@ class TicTacToe(BoardGame):
         r, c = move
         if self.board[r][c] == ' ':
             self.board[r][c] = self.current
+            self.key ^= self.zobrist.squares[r * self.cols + c][0 if self.current == 'X' else 1]
             self.current = 'O' if self.current == 'X' else 'X'
+            self.history.append(move)
             return True
         return False
 
+    def undo_move(self):
+        r, c = self.history.pop()
+        self.current = self.board[r][c]
+        self.key ^= self.zobrist.squares[r * self.cols + c][0 if self.current == 'X' else 1]
+        self.board[r][c] = ' '
+
     def winner(self):
         lines = []
         # Rows, columns, diagonals
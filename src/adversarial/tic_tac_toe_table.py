@@ -0,0 +1,167 @@
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+'''
+Tabela pré-calculada com o valor minimax de todas as posições alcançáveis
+do Tic-Tac-Toe.
+
+Cada tabuleiro é codificado em base 3 (' ' = 0, 'X' = 1, 'O' = 2; casa
+r * 3 + c com peso 3 ** (r * 3 + c)) e reduzido à forma canônica: o menor
+código entre as 8 simetrias do tabuleiro (rotações e reflexões). A tabela
+guarda apenas as formas canônicas, ordenadas, com o valor do ponto de vista
+de 'X' (+1 vitória, -1 derrota, 0 empate), e a consulta é uma busca binária.
+
+A tabela é gerada uma única vez, salva em disco e carregada sob demanda na
+primeira consulta.
+'''
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tic_tac_toe_table.npz')
+
+CELL_CODE = {' ': 0, 'X': 1, 'O': 2}
+
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6),
+         (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+
+
+def _symmetries():
+    # Cada simetria é uma permutação: a casa i do tabuleiro transformado vem da casa perm[i]
+    def rotate(p):
+        return [p[(2 - c) * 3 + r] for r in range(3) for c in range(3)]
+
+    def reflect(p):
+        return [p[r * 3 + (2 - c)] for r in range(3) for c in range(3)]
+
+    perms, p = [], list(range(9))
+    for _ in range(4):
+        perms.append(p)
+        perms.append(reflect(p))
+        p = rotate(p)
+    return perms
+
+
+SYMMETRIES = _symmetries()
+POWERS = [3 ** i for i in range(9)]
+
+
+def canonical(cells):
+    '''Menor código base 3 entre as 8 simetrias de `cells` (9 valores 0/1/2).'''
+    return min(sum(cells[perm[i]] * POWERS[i] for i in range(9) if cells[perm[i]]) for perm in SYMMETRIES)
+
+
+def _winner(cells):
+    for a, b, c in LINES:
+        if cells[a] and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return 0
+
+
+def solve():
+    '''
+    Enumera todas as posições alcançáveis a partir do tabuleiro vazio e calcula
+    o valor minimax de cada forma canônica.
+
+    :return: Tupla (códigos canônicos ordenados, valores) como arrays NumPy.
+    '''
+    values = {}
+
+    def value(cells, player):
+        key = canonical(cells)
+        if key in values:
+            return values[key]
+        winner = _winner(cells)
+        if winner:
+            result = 1 if winner == 1 else -1
+        elif 0 not in cells:
+            result = 0
+        else:
+            results = []
+            for i in range(9):
+                if cells[i] == 0:
+                    cells[i] = player
+                    results.append(value(cells, 3 - player))
+                    cells[i] = 0
+            result = max(results) if player == 1 else min(results)
+        values[key] = result
+        return result
+
+    value([0] * 9, 1)
+    codes = np.array(sorted(values), dtype=np.uint16)
+    return codes, np.array([values[c] for c in codes.tolist()], dtype=np.int8)
+
+
+class SolutionTable:
+    def __init__(self, codes, values):
+        self.codes = codes
+        self.values = values
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        '''
+        Carrega a tabela de `path`; se o arquivo não existir ou estiver corrompido, resolve
+        o jogo e tenta salvá-lo.
+        '''
+        try:
+            with np.load(path) as data:
+                return cls(data['codes'], data['values'])
+        except (OSError, ValueError, EOFError, KeyError, zipfile.BadZipFile):
+            pass
+        table = cls(*solve())
+        table.save(path)
+        return table
+
+    def save(self, path=DEFAULT_PATH):
+        '''
+        Grava em um arquivo temporário no mesmo diretório e o renomeia para `path`, para que
+        outros processos carregando a tabela ao mesmo tempo nunca leiam um arquivo pela metade.
+        '''
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.npz')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, codes=self.codes, values=self.values)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def value(self, board):
+        '''Valor minimax (ponto de vista de 'X') de um tabuleiro 3x3 em lista de listas.'''
+        code = canonical([CELL_CODE[cell] for row in board for cell in row])
+        i = np.searchsorted(self.codes, code)
+        if i == len(self.codes) or self.codes[i] != code:
+            raise KeyError("Posição não alcançável no Tic-Tac-Toe")
+        return int(self.values[i])
+
+    def best_move(self, game):
+        '''
+        Mesma escolha de minimax.best_move (primeira jogada de melhor valor, na ordem
+        de available_moves), obtida por consultas à tabela.
+        '''
+        player = game.current
+        best_val = float('-inf') if player == 'X' else float('inf')
+        best_action = None
+        for move in game.available_moves():
+            game.make_move(move)
+            val = self.value(game.board)
+            game.undo_move()
+            if (player == 'X' and val > best_val) or (player == 'O' and val < best_val):
+                best_val = val
+                best_action = move
+        return best_action
+
+
+_table = None
+
+def get_table(path=DEFAULT_PATH):
+    '''Tabela compartilhada pelo processo, carregada na primeira chamada.'''
+    global _table
+    if _table is None:
+        _table = SolutionTable.load(path)
+    return _table
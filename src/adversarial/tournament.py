@@ -0,0 +1,285 @@
+'''
+Torneio entre as IAs (sem interface): cada par de motores joga um número de
+partidas alternando quem começa, em paralelo num pool de processos. Para cada
+motor são registrados vitórias, empates, derrotas, tempo médio por jogada e nós
+por jogada, e o Elo é estimado pelo modelo de Bradley-Terry (empate = meia
+vitória) com intervalo de confiança de 95% por bootstrap sobre as partidas.
+
+"Nós" são as posições geradas (make_move) no minimax e no alfa-beta, as
+iterações (simulações) no MCTS e os nós visitados no QuartoSolver.
+
+Uso: python tournament.py [connect_four|quarto] [--games N] [--workers N]
+'''
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'q2.2'))
+
+from connect_four import BitboardConnectFour
+from mcts import mcts
+from minimax import iterative_deepening
+from play_connect_four_minimax_with_hef import best_move as minimax_move
+from connect_four_eval import evaluate_connect_four_np, evaluate_games_batch
+from connect_four_rollout import BatchRollout
+from process_pool import get_pool
+
+from quarto_bitboard import BitboardQuarto
+from minimax_quarto import best_move_quarto
+from mcts_quarto import search as quarto_search
+from quarto_solver import QuartoSolver
+
+
+class CountingConnectFour(BitboardConnectFour):
+    # Conta as jogadas feitas (inclusive nas cópias) para medir os nós do minimax
+    nodes = 0
+
+    def make_move(self, move):
+        CountingConnectFour.nodes += 1
+        return super().make_move(move)
+
+
+class CountingQuarto(BitboardQuarto):
+    nodes = 0
+
+    def make_move(self, move):
+        CountingQuarto.nodes += 1
+        return super().make_move(move)
+
+
+def new_connect_four(rng):
+    return CountingConnectFour()
+
+
+def new_quarto(rng):
+    game = CountingQuarto()
+    game.select_piece(rng.choice(game.all_pieces))
+    return game
+
+
+GAMES = {
+    'connect_four': new_connect_four,
+    'quarto': new_quarto,
+}
+
+
+# Motores: recebem o jogo e os parâmetros e retornam (jogada, nós)
+def counted(game, choose):
+    counter = type(game)
+    counter.nodes = 0
+    move = choose()
+    return move, counter.nodes
+
+
+def minimax_engine(game, depth=2):
+    return counted(game, lambda: minimax_move(game, depth=depth))
+
+
+def alphabeta_engine(game, depth=6, time_limit=None):
+    return counted(game, lambda: iterative_deepening(
+        game, evaluate_connect_four_np, max_depth=depth, time_limit=time_limit,
+        batch_evaluate_fn=evaluate_games_batch)[0])
+
+
+def mcts_engine(game, iterations=200, time_limit=None, batch=None, rave=False):
+    rollout_fn = BatchRollout(batch) if batch else None
+    move, stats = mcts(game, iterations=iterations, time_limit=time_limit, return_stats=True,
+                       rollout_fn=rollout_fn, rave=rave)
+    return move, stats.iterations
+
+
+def quarto_minimax_engine(game, depth=2):
+    return counted(game, lambda: best_move_quarto(game, depth=depth))
+
+
+def quarto_mcts_engine(game, iterations=500, time_limit=None, widening=True, rave=False):
+    root = quarto_search(game, iterations, time_limit, widening=widening, rave=rave)
+    return max(root.children, key=lambda c: c.visits).move, root.visits
+
+
+def quarto_solver_engine(game, depth=2, endgame_squares=9):
+    solver = QuartoSolver(depth, endgame_squares)
+    move, _, _ = solver.solve(game)
+    return move, solver.nodes
+
+
+ENGINES = {
+    'minimax': minimax_engine,
+    'alphabeta': alphabeta_engine,
+    'mcts': mcts_engine,
+    'quarto_minimax': quarto_minimax_engine,
+    'quarto_mcts': quarto_mcts_engine,
+    'quarto_solver': quarto_solver_engine,
+}
+
+# Participantes padrão: (nome, motor, parâmetros)
+DEFAULT_FIELDS = {
+    'connect_four': [
+        ('minimax d2', 'minimax', {'depth': 2}),
+        ('minimax d4', 'minimax', {'depth': 4}),
+        ('alphabeta d6', 'alphabeta', {'depth': 6}),
+        ('mcts 200', 'mcts', {'iterations': 200}),
+        ('mcts 200 rave', 'mcts', {'iterations': 200, 'rave': True}),
+        ('mcts 1000', 'mcts', {'iterations': 1000}),
+    ],
+    'quarto': [
+        ('minimax d1', 'quarto_minimax', {'depth': 1}),
+        ('mcts 500', 'quarto_mcts', {'iterations': 500}),
+        ('mcts 2000', 'quarto_mcts', {'iterations': 2000}),
+        ('solver d1', 'quarto_solver', {'depth': 1}),
+    ],
+}
+
+
+def play_match(game_name, first, second, seed):
+    '''
+    Joga uma partida entre dois participantes (nome, motor, parâmetros); `first` começa.
+    :return: (vencedor: 0 para first, 1 para second ou None), e para cada lado
+             (jogadas, tempo total, nós)
+    '''
+    rng = random.Random(seed)
+    random.seed(seed)
+    game = GAMES[game_name](rng)
+    starter = game.current
+    sides = [first, second]
+    moves, think, nodes = [0, 0], [0.0, 0.0], [0, 0]
+
+    while not game.game_over():
+        side = 0 if game.current == starter else 1
+        _, engine, params = sides[side]
+        start = time.perf_counter()
+        move, searched = ENGINES[engine](game, **params)
+        think[side] += time.perf_counter() - start
+        moves[side] += 1
+        nodes[side] += searched
+        game.make_move(move)
+
+    winner = game.winner()
+    result = None if winner is None else (0 if winner == starter else 1)
+    return result, moves, think, nodes
+
+
+class EngineStats:
+    def __init__(self, name):
+        self.name = name
+        self.wins = self.draws = self.losses = 0
+        self.moves = 0
+        self.think_time = 0.0
+        self.nodes = 0
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def time_per_move(self):
+        return self.think_time / self.moves if self.moves else 0.0
+
+    def nodes_per_move(self):
+        return self.nodes / self.moves if self.moves else 0.0
+
+
+def fit_elo(n_players, games, iterations=200):
+    '''
+    Ratings de Bradley-Terry (em Elo, média 0) a partir de uma lista de partidas
+    (i, j, pontos de i). Cada par recebe um empate fictício para que um motor
+    sem vitórias (ou sem derrotas) tenha um rating finito.
+    '''
+    score = [[0.0] * n_players for _ in range(n_players)]
+    count = [[0] * n_players for _ in range(n_players)]
+    for i, j, points in games:
+        score[i][j] += points
+        score[j][i] += 1 - points
+        count[i][j] += 1
+        count[j][i] += 1
+    for i in range(n_players):
+        for j in range(n_players):
+            if i != j and count[i][j]:
+                score[i][j] += 0.5
+                count[i][j] += 1
+
+    strength = [1.0] * n_players
+    for _ in range(iterations):
+        for i in range(n_players):
+            total = sum(score[i])
+            denominator = sum(count[i][j] / (strength[i] + strength[j])
+                              for j in range(n_players) if j != i and count[i][j])
+            if denominator:
+                strength[i] = max(total / denominator, 1e-9)
+        mean = sum(math.log(s) for s in strength) / n_players
+        strength = [s / math.exp(mean) for s in strength]
+    return [400 * math.log10(s) for s in strength]
+
+
+def elo_intervals(n_players, games, samples=200, seed=0):
+    '''Intervalo de 95% do Elo de cada participante por bootstrap sobre as partidas.'''
+    rng = random.Random(seed)
+    draws = [fit_elo(n_players, [rng.choice(games) for _ in games]) for _ in range(samples)]
+    intervals = []
+    for i in range(n_players):
+        values = sorted(d[i] for d in draws)
+        intervals.append((values[int(0.025 * samples)], values[int(0.975 * samples) - 1]))
+    return intervals
+
+
+def run_tournament(game_name, field=None, games_per_pair=4, workers=1, seed=2025):
+    '''
+    Todos contra todos: cada par joga games_per_pair partidas, alternando quem começa.
+    :return: (lista de EngineStats, Elo, intervalos de 95%), na ordem de `field`
+    '''
+    field = field or DEFAULT_FIELDS[game_name]
+    tasks = []
+    for a in range(len(field)):
+        for b in range(a + 1, len(field)):
+            for k in range(games_per_pair):
+                first, second = (a, b) if k % 2 == 0 else (b, a)
+                tasks.append((first, second, seed + len(tasks)))
+
+    if workers > 1:
+        pool = get_pool(workers)
+        futures = [pool.submit(play_match, game_name, field[f], field[s], task_seed)
+                   for f, s, task_seed in tasks]
+        results = [future.result() for future in futures]
+    else:
+        results = [play_match(game_name, field[f], field[s], task_seed) for f, s, task_seed in tasks]
+
+    stats = [EngineStats(name) for name, _, _ in field]
+    games = []
+    for (first, second, _), (result, moves, think, nodes) in zip(tasks, results):
+        for side, index in enumerate((first, second)):
+            entry = stats[index]
+            entry.moves += moves[side]
+            entry.think_time += think[side]
+            entry.nodes += nodes[side]
+            if result is None:
+                entry.draws += 1
+            elif result == side:
+                entry.wins += 1
+            else:
+                entry.losses += 1
+        games.append((first, second, 0.5 if result is None else 1.0 - result))
+
+    ratings = fit_elo(len(field), games)
+    intervals = elo_intervals(len(field), games)
+    return stats, ratings, intervals
+
+
+def print_report(stats, ratings, intervals):
+    print(f"{'motor':<16}{'J':>4}{'V':>4}{'E':>4}{'D':>4}{'Elo':>7}{'IC 95%':>16}{'s/jog':>9}{'nós/jog':>11}")
+    order = sorted(range(len(stats)), key=lambda i: ratings[i], reverse=True)
+    for i in order:
+        s = stats[i]
+        low, high = intervals[i]
+        print(f"{s.name:<16}{s.games:>4}{s.wins:>4}{s.draws:>4}{s.losses:>4}{ratings[i]:>7.0f}"
+              f"{f'[{low:.0f}, {high:.0f}]':>16}{s.time_per_move():>9.3f}{s.nodes_per_move():>11.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Torneio entre as IAs dos jogos adversariais")
+    parser.add_argument('game', choices=sorted(GAMES), nargs='?', default='connect_four')
+    parser.add_argument('--games', type=int, default=4, help="partidas por par de motores")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    print_report(*run_tournament(args.game, games_per_pair=args.games, workers=args.workers))